@@ -8,6 +8,7 @@ import tempfile
 from pathlib import Path
 import time
 import sys
+import queue
 import traceback
 
 def handle_exception(e):
@@ -30,7 +31,7 @@ def handle_exception(e):
         st.rerun()
     
     # Debug info (hanya di development)
-    if os.environ.get("DEBUG_MODE") == "true":
+    if DEBUG_MODE:
         with st.expander("Technical Details (for developers)"):
             st.code(traceback.format_exc())
 
@@ -39,9 +40,24 @@ def handle_exception(e):
 sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
 
 # Import modul
-from utils.stt_processor import load_stt_model, load_text_models, transcribe_and_clean
-from utils.nonverbal_analysis import analyze_non_verbal
-from utils.scoring_logic import load_embedder_model, score_with_rubric, compute_confidence_score
+from utils.stt_processor import load_stt_model, load_text_models, prepare_audio_upload, MAX_AUDIO_SECONDS, ML_TERMS
+from utils.scoring_logic import load_embedder_model
+from utils.cascade_scorer import CascadeScorer
+from utils.duplicate_index import load_duplicate_index
+from utils.results_store import ResultsStore
+from utils.report_export import build_report, render_html, render_pdf, pdf_available
+from utils.rubric_bundle import load_bundle, QUESTIONS_PATH, RUBRIC_PATH
+from utils.question_bank import QuestionBank, NUM_INTERVIEW_QUESTIONS
+from utils.pipeline import process_answer, score_stage, timed
+from utils.live_session import LiveSession, to_mono_float
+from utils.profiling import DEBUG_MODE, profile_request, should_profile
+
+# Rekaman langsung di aplikasi (opsional, butuh streamlit-webrtc)
+try:
+    from streamlit_webrtc import webrtc_streamer, WebRtcMode
+    LIVE_RECORDING_AVAILABLE = True
+except ImportError:
+    LIVE_RECORDING_AVAILABLE = False
 
 # ==================== KONFIGURASI ====================
 st.set_page_config(
@@ -92,18 +108,68 @@ if 'processing' not in st.session_state:
     st.session_state.processing = False
 if 'interview_started' not in st.session_state:
     st.session_state.interview_started = False
+if 'interview_questions' not in st.session_state:
+    st.session_state.interview_questions = {}
+if 'profile_session' not in st.session_state:
+    # Profil setiap request sesi ini: buka aplikasi dengan ?profile=1 (hanya DEBUG_MODE)
+    st.session_state.profile_session = (
+        DEBUG_MODE and st.experimental_get_query_params().get("profile", ["0"])[0] == "1"
+    )
 
 # ==================== LOAD DATA ====================
+@st.cache_resource
+def load_rubric_bundle():
+    """Bundle pertanyaan/rubrik yang di-memory-map; di-build ulang jika backend embedding berbeda"""
+    # Embedder yang sama dengan cache load_all_models (tidak memuat model kedua)
+    return load_bundle(embedder_factory=lambda: load_all_models()[2])
+
 @st.cache_resource
 def load_questions():
-    with open('data/questions.json', 'r') as f:
+    bundle = load_rubric_bundle()
+    if bundle is not None:
+        return bundle.questions
+    with open(QUESTIONS_PATH, 'r') as f:
         return json.load(f)
 
 @st.cache_resource
 def load_rubric():
-    with open('data/rubric_data.json', 'r') as f:
+    bundle = load_rubric_bundle()
+    if bundle is not None:
+        return bundle.rubric
+    with open(RUBRIC_PATH, 'r') as f:
         return json.load(f)
 
+@st.cache_resource
+def load_question_bank():
+    """Bank pertanyaan terindeks (dibagi antar sesi, read-only setelah dibuat)"""
+    embedder_model = load_all_models()[2]
+    return QuestionBank(load_questions(), load_rubric(), bundle=load_rubric_bundle(), embedder=embedder_model)
+
+@st.cache_resource
+def load_cascade_scorer():
+    """Cascade scorer (prefilter leksikal sebelum embedding), dibagi antar sesi"""
+    scorer = CascadeScorer(load_rubric(), domain_terms=ML_TERMS)
+    scorer.load_calibration()
+    return scorer
+
+@st.cache_resource
+def load_answer_index():
+    """Indeks MinHash/LSH jawaban yang sudah dinilai (deteksi near-duplicate)"""
+    return load_duplicate_index()
+
+@st.cache_resource
+def load_results_store():
+    """Store Parquet untuk semua jawaban yang dinilai"""
+    return ResultsStore()
+
+def build_interview(position=""):
+    """Sampling pertanyaan interview dari bank, per role jika cocok dengan posisi"""
+    bank = load_question_bank()
+    role = position.strip().lower().replace(" ", "_") if position else None
+    if role not in bank.roles():
+        role = None
+    return bank.sample_interview(NUM_INTERVIEW_QUESTIONS, role=role)
+
 # ==================== LOAD MODELS ====================
 @st.cache_resource
 def load_all_models():
@@ -300,6 +366,8 @@ def candidate_registration():
                     'position': position,
                     'start_time': datetime.now().isoformat()
                 }
+                st.session_state.interview_questions = build_interview(position)
+                st.session_state.current_question = 1
                 st.session_state.current_step = 3
                 st.rerun()
             else:
@@ -308,11 +376,237 @@ def candidate_registration():
                 else:
                     st.warning("Please fill all required fields (*)")
 
+def pipeline_context():
+    """Resource bersama untuk pipeline pemrosesan jawaban"""
+    return {
+        'scorer': load_cascade_scorer(),
+        'candidate': st.session_state.candidate_info,
+        'question_bank': load_question_bank(),
+        'answer_index': load_answer_index(),
+        'results_store': load_results_store(),
+    }
+
+def show_profile_note(profile):
+    """Info lokasi file profil (hanya muncul jika request ini diprofil)"""
+    if profile is not None and profile.summary_path is not None:
+        st.caption(f"🔬 Profile saved: {profile.summary_path}")
+
+def save_and_advance(question_num, total_questions, result, audio_path):
+    """Simpan hasil pipeline ke session state, tampilkan ringkasan, lalu lanjut"""
+    st.session_state.responses[question_num] = {
+        'transcript': result['transcript'],
+        'nonverbal': result['nonverbal'],
+        'word_timings': result['word_timings'].to_dict(),
+        'prescreen_status': result['prescreen_status'],
+        'audio_path': str(audio_path),
+        'timestamp': datetime.now().isoformat()
+    }
+    
+    st.session_state.scores[question_num] = {
+        'score': result['score'],
+        'confidence': result['confidence'],
+        'feedback': result['feedback'],
+        'scoring_stage': result['scoring_stage'],
+        'near_duplicate_of': result['near_duplicate_of'],
+        'question': result['question']
+    }
+    
+    # Success message
+    st.success(f"✅ Question {question_num} processed successfully!")
+    
+    # Show quick results
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Content Score", f"{result['score']}/4")
+    with col2:
+        st.metric("Confidence", f"{result['confidence']:.0%}")
+    with col3:
+        if 'qualitative_summary' in result['nonverbal']:
+            st.metric("Delivery", result['nonverbal']['qualitative_summary'])
+    
+    # Auto-advance after 2 seconds
+    time.sleep(2)
+    
+    # Move to next question or report
+    if question_num < total_questions:
+        st.session_state.current_question += 1
+    else:
+        st.session_state.current_step = 4
+    
+    st.rerun()
+
+def upload_response_ui(question_num, total_questions, question_data):
+    """Upload file jawaban lalu proses"""
+    st.markdown("### 🎤 Upload Your Response")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        uploaded_file = st.file_uploader(
+            "Choose audio or video file",
+            type=['mp3', 'wav', 'm4a', 'mp4', 'mov'],
+            key=f"uploader_{question_num}",
+            help="Upload your recorded response (max 5 minutes)"
+        )
+    
+    with col2:
+        st.markdown("""
+        <div style="background: #F0F9FF; padding: 15px; border-radius: 10px; border-left: 4px solid #0EA5E9;">
+            <p style="margin: 0; color: #0369A1; font-size: 0.9rem;">
+                ✅ Supported formats: MP3, WAV, M4A, MP4, MOV<br>
+                ⏱️ Recommended: 1-3 minutes per question<br>
+                🎯 Focus on clarity and examples
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    if not uploaded_file:
+        return
+    
+    # Display audio player
+    st.audio(uploaded_file, format=uploaded_file.type)
+    
+    # Process button
+    if st.button(f"✅ Process Question {question_num}", 
+                type="primary", 
+                use_container_width=True,
+                disabled=st.session_state.processing):
+        
+        st.session_state.processing = True
+        
+        try:
+            # Create temp directory
+            temp_dir = create_temp_dir()
+            
+            # Durasi tiap tahap (detik) untuk results store
+            stage_timings = {}
+            
+            # Save uploaded file (probe metadata, decode hanya jendela yang diizinkan)
+            with timed(stage_timings, 'upload'):
+                audio_path, probe = prepare_audio_upload(uploaded_file, temp_dir)
+            if probe.get('truncated'):
+                st.warning(
+                    f"⏱️ Recording is {probe['duration'] / 60:.1f} minutes long; "
+                    f"only the first {MAX_AUDIO_SECONDS // 60} minutes will be evaluated."
+                )
+            
+            # Show processing status
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            
+            def on_progress(message, percent):
+                status_text.text(message)
+                progress_bar.progress(percent)
+            
+            # Load models
+            on_progress("🔄 Loading AI models...", 20)
+            models = load_all_models()
+            
+            with profile_request(
+                f"q{question_num}_upload",
+                enabled=should_profile(st.session_state.profile_session)
+            ) as profile:
+                result = process_answer(
+                    audio_path, question_data, models, stage_timings=stage_timings,
+                    on_progress=on_progress, **pipeline_context()
+                )
+            show_profile_note(profile)
+            save_and_advance(question_num, total_questions, result, audio_path)
+            
+        except Exception as e:
+            st.error(f"❌ Error processing response: {str(e)}")
+            # TAMBAHKAN tombol retry
+            if st.button("🔄 Try Again", key=f"retry_{question_num}"):
+                st.session_state.processing = False
+                st.rerun()
+    
+        finally:
+            st.session_state.processing = False
+
+def record_response_ui(question_num, total_questions, question_data):
+    """Rekam jawaban langsung; audio diproses bertahap selama perekaman"""
+    st.markdown("### 🎙️ Record Your Response")
+    st.caption("Press START, answer the question, then press STOP. Processing runs while you speak.")
+    
+    session_key = f"live_session_{question_num}"
+    ctx = webrtc_streamer(
+        key=f"recorder_{question_num}",
+        mode=WebRtcMode.SENDONLY,
+        audio_receiver_size=1024,
+        media_stream_constraints={"audio": True, "video": False},
+    )
+    
+    if ctx.state.playing:
+        whisper_model = load_all_models()[0]
+        if st.session_state.get(session_key) is None:
+            temp_dir = create_temp_dir()
+            wav_path = temp_dir / f"live_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.wav"
+            st.session_state[session_key] = LiveSession(whisper_model, wav_path)
+        live = st.session_state[session_key]
+        
+        stats_text = st.empty()
+        while ctx.audio_receiver and not live.capped:
+            try:
+                frames = ctx.audio_receiver.get_frames(timeout=1)
+            except queue.Empty:
+                continue
+            for frame in frames:
+                samples = frame.to_ndarray()
+                if not live.feed(to_mono_float(samples, channels=len(frame.layout.channels)), frame.sample_rate):
+                    break
+            stats = live.live_stats()
+            stats_text.caption(
+                f"⏺️ {stats['duration']:.0f}s recorded · {stats['speech_seconds']:.0f}s speech · "
+                f"{stats['windows_done']}/{stats['windows_submitted']} segments transcribed"
+            )
+        if not live.capped:
+            return
+        # Batas durasi tercapai: proses langsung tanpa menunggu STOP
+        st.warning(f"⚠️ Recording reached {MAX_AUDIO_SECONDS // 60} minutes and was stopped automatically.")
+    
+    live = st.session_state.get(session_key)
+    if live is None:
+        return
+    
+    # Rekaman berhenti: selesaikan jendela terakhir lalu scoring
+    st.session_state[session_key] = None
+    st.session_state.processing = True
+    try:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        def on_progress(message, percent):
+            status_text.text(message)
+            progress_bar.progress(percent)
+        
+        models = load_all_models()
+        _, spell_checker, _, english_words = models
+        stage_timings = {}
+        
+        with profile_request(
+            f"q{question_num}_live",
+            enabled=should_profile(st.session_state.profile_session)
+        ) as profile:
+            on_progress("🗣️ Finishing transcription...", 40)
+            with timed(stage_timings, 'stt'):
+                transcript, word_timings, disfluency, status = live.finish(spell_checker, english_words)
+            
+            result = score_stage(
+                transcript, word_timings, disfluency, live.out_wav_path, question_data, models,
+                stage_timings=stage_timings, prescreen_status=status, on_progress=on_progress,
+                **pipeline_context()
+            )
+        show_profile_note(profile)
+        save_and_advance(question_num, total_questions, result, live.out_wav_path)
+    except Exception as e:
+        st.error(f"❌ Error processing response: {str(e)}")
+    finally:
+        st.session_state.processing = False
+
 def show_question_ui(question_num, total_questions):
     """UI untuk pertanyaan interview"""
-    # Load data
-    questions = load_questions()
-    question_data = questions[str(question_num)]
+    # Pertanyaan sudah di-sampling saat registrasi (tidak dimuat ulang tiap rerun)
+    question_data = st.session_state.interview_questions[str(question_num)]
     
     # Progress
     progress = question_num / total_questions
@@ -349,136 +643,17 @@ def show_question_ui(question_num, total_questions):
     """, unsafe_allow_html=True)
     
     # Response section
-    st.markdown("### 🎤 Upload Your Response")
-    
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        uploaded_file = st.file_uploader(
-            "Choose audio or video file",
-            type=['mp3', 'wav', 'm4a', 'mp4', 'mov'],
-            key=f"uploader_{question_num}",
-            help="Upload your recorded response (max 5 minutes)"
+    response_mode = "Upload file"
+    if LIVE_RECORDING_AVAILABLE:
+        response_mode = st.radio(
+            "Response mode", ["Upload file", "Record in app"],
+            horizontal=True, key=f"response_mode_{question_num}"
         )
     
-    with col2:
-        st.markdown("""
-        <div style="background: #F0F9FF; padding: 15px; border-radius: 10px; border-left: 4px solid #0EA5E9;">
-            <p style="margin: 0; color: #0369A1; font-size: 0.9rem;">
-                ✅ Supported formats: MP3, WAV, M4A, MP4, MOV<br>
-                ⏱️ Recommended: 1-3 minutes per question<br>
-                🎯 Focus on clarity and examples
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    if uploaded_file:
-        # Display audio player
-        st.audio(uploaded_file, format=uploaded_file.type)
-        
-        # Process button
-        if st.button(f"✅ Process Question {question_num}", 
-                    type="primary", 
-                    use_container_width=True,
-                    disabled=st.session_state.processing):
-            
-            st.session_state.processing = True
-            
-            try:
-                # Create temp directory
-                temp_dir = create_temp_dir()
-                
-                # Save uploaded file
-                audio_path = save_uploaded_file(uploaded_file, temp_dir)
-                
-                # Show processing status
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                # Step 1: Load models
-                status_text.text("🔄 Loading AI models...")
-                whisper_model, spell_checker, embedder_model, english_words = load_all_models()
-                progress_bar.progress(20)
-                
-                # Step 2: Analyze non-verbal
-                status_text.text("📊 Analyzing speech patterns...")
-                nonverbal_result = analyze_non_verbal(str(audio_path))
-                progress_bar.progress(40)
-                
-                # Step 3: Transcribe
-                status_text.text("🗣️ Transcribing your response...")
-                transcript = transcribe_and_clean(
-                    str(audio_path), 
-                    whisper_model, 
-                    spell_checker, 
-                    english_words
-                )
-                progress_bar.progress(70)
-                
-                # Step 4: Score response
-                status_text.text("📝 Evaluating your answer...")
-                rubric = load_rubric()
-                question_key = question_data['key']
-                question_text = question_data['question']
-                
-                # Calculate confidence score
-                confidence = compute_confidence_score(transcript)
-                
-                # Calculate semantic score
-                score, feedback = score_with_rubric(
-                    question_key, question_text, transcript, rubric, embedder_model
-                )
-                
-                progress_bar.progress(100)
-                
-                # Save results
-                st.session_state.responses[question_num] = {
-                    'transcript': transcript,
-                    'nonverbal': nonverbal_result,
-                    'audio_path': str(audio_path),
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                st.session_state.scores[question_num] = {
-                    'score': score,
-                    'confidence': confidence,
-                    'feedback': feedback,
-                    'question': question_text
-                }
-                
-                # Success message
-                st.success(f"✅ Question {question_num} processed successfully!")
-                
-                # Show quick results
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Content Score", f"{score}/4")
-                with col2:
-                    st.metric("Confidence", f"{confidence:.0%}")
-                with col3:
-                    if 'qualitative_summary' in nonverbal_result:
-                        st.metric("Delivery", nonverbal_result['qualitative_summary'])
-                
-                # Auto-advance after 2 seconds
-                time.sleep(2)
-                
-                # Move to next question or report
-                if question_num < total_questions:
-                    st.session_state.current_question += 1
-                else:
-                    st.session_state.current_step = 4
-                
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f"❌ Error processing response: {str(e)}")
-                # TAMBAHKAN tombol retry
-                if st.button("🔄 Try Again", key=f"retry_{question_num}"):
-                    st.session_state.processing = False
-                    st.rerun()
-    
-            finally:
-                st.session_state.processing = False
+    if response_mode == "Record in app":
+        record_response_ui(question_num, total_questions, question_data)
+    else:
+        upload_response_ui(question_num, total_questions, question_data)
     
     # Navigation buttons
     st.markdown("---")
@@ -505,6 +680,9 @@ def show_question_ui(question_num, total_questions):
 
 def show_final_report():
     """Tampilkan laporan akhir"""
+    # Wawancara selesai: tulis hasil yang masih di buffer ke Parquet
+    load_results_store().flush()
+
     st.markdown("""
     <div class="main-container">
         <div class="interview-header fade-in">
@@ -591,17 +769,42 @@ def show_final_report():
             st.rerun()
     
     with col2:
-        # Create downloadable report (simplified)
-        report_data = {
-            'Candidate': st.session_state.candidate_info.get('name', ''),
-            'Email': st.session_state.candidate_info.get('email', ''),
-            'Overall Score': f"{final_score:.1f}%",
-            'Evaluation Date': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        # Render laporan hanya saat diminta; hasilnya disimpan di session state
+        # sampai skor berubah (rerun lain tidak me-render ulang)
+        fmt, mime = ("pdf", "application/pdf") if pdf_available() else ("html", "text/html")
+        report_key = tuple(
+            (q_num, score_data['score'], score_data['feedback'])
+            for q_num, score_data in sorted(st.session_state.scores.items())
+        )
+        report_file = st.session_state.get('report_file')
         
-        if st.button("📥 Download Report (PDF)", use_container_width=True):
-            # In production, generate actual PDF
-            st.success("Report generation would be implemented with proper PDF library")
+        if report_file is None or report_file['key'] != report_key:
+            if st.button(f"📄 Prepare Report ({fmt.upper()})", use_container_width=True):
+                report = build_report(
+                    st.session_state.candidate_info,
+                    [
+                        {
+                            'question_key': q_num,
+                            'question': score_data['question'],
+                            'score': score_data['score'],
+                            'confidence': score_data['confidence'],
+                            'feedback': score_data['feedback'],
+                            'delivery': st.session_state.responses.get(q_num, {}).get('nonverbal', {}).get('qualitative_summary'),
+                            'transcript': st.session_state.responses.get(q_num, {}).get('transcript', ''),
+                        }
+                        for q_num, score_data in sorted(st.session_state.scores.items())
+                    ]
+                )
+                with st.spinner("Preparing report..."):
+                    data = render_pdf(report) if fmt == "pdf" else render_html(report)
+                st.session_state.report_file = {'key': report_key, 'data': data}
+                st.rerun()
+        else:
+            file_stem = f"interview_report_{datetime.now().strftime('%Y%m%d')}"
+            st.download_button(
+                f"📥 Download Report ({fmt.upper()})", data=report_file['data'],
+                file_name=f"{file_stem}.{fmt}", mime=mime, use_container_width=True
+            )
     
     with col3:
         if st.button("🏠 Back to Home", use_container_width=True):
@@ -630,8 +833,11 @@ def main():
             candidate_registration()
         
         elif st.session_state.current_step == 3:
-            questions = load_questions()
-            total_questions = len(questions)
+            if not st.session_state.interview_questions:
+                st.session_state.interview_questions = build_interview(
+                    st.session_state.candidate_info.get('position', '')
+                )
+            total_questions = len(st.session_state.interview_questions)
             show_question_ui(st.session_state.current_question, total_questions)
         
         elif st.session_state.current_step == 4:
@@ -645,8 +851,7 @@ def main():
                     st.info(f"**Candidate:** {st.session_state.candidate_info['name']}")
             
             if st.session_state.current_step == 3:
-                questions = load_questions()
-                total = len(questions)
+                total = max(1, len(st.session_state.interview_questions))
                 current = st.session_state.current_question
                 st.progress(current / total)
                 st.caption(f"Question {current} of {total}")
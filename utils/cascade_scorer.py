@@ -0,0 +1,303 @@
+# utils/cascade_scorer.py
+"""
+Cascade scorer: prefilter leksikal murah sebelum embedding.
+
+Tahap 1 (rule)      : `is_non_relevant` / jawaban terlalu pendek -> skor 0
+Tahap 2 (lexical)   : BM25 terhadap indikator rubrik + istilah ML. Kasus
+                      yang jelas (confidence terkalibrasi >= threshold)
+                      langsung diberi skor. Tahap ini NONAKTIF sampai
+                      kalibrasi dari jawaban berlabel (skor penilai)
+                      dimuat dari CALIBRATION_PATH.
+Tahap 3 (embedding) : `score_with_rubric` untuk kasus yang ambigu.
+
+Jumlah jawaban yang diselesaikan tiap tahap dicatat di `stats` untuk
+tuning threshold.
+
+Kalibrasi dari file berlabel (JSON list {question_id, answer, score}):
+    python -m utils.cascade_scorer labeled_answers.json
+"""
+import json
+import math
+import re
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from utils.scoring_logic import score_with_rubric, is_non_relevant, MIN_LENGTH_FOR_SCORE
+
+# --- PARAMETER ---
+BM25_K1 = 1.5
+BM25_B = 0.75
+LEXICAL_HIT_THRESHOLD = 0.5   # overlap ternormalisasi agar indikator dihitung "cocok"
+OFF_TOPIC_STRENGTH = 0.15     # di bawah ini jawaban diprediksi skor 1
+CASCADE_MIN_CONFIDENCE = 0.85
+MIN_CALIBRATION_SAMPLES = 20
+
+CALIBRATION_FORMAT_VERSION = 2
+CALIBRATION_PATH = Path(__file__).resolve().parent.parent / "data" / "cascade_calibration.json"
+
+# Bin kekuatan leksikal. Confidence dikalibrasi per (bin, kelas prediksi);
+# tanpa kalibrasi semuanya 0 sehingga tahap leksikal tidak pernah memutuskan skor.
+STRENGTH_BINS = [0.0, 0.05, 0.15, 0.3, 0.45, 0.6, 0.75, 1.01]
+
+STAGE_RULE = "rule"
+STAGE_LEXICAL = "lexical"
+STAGE_EMBEDDING = "embedding"
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "is", "are",
+    "was", "were", "be", "it", "this", "that", "as", "at", "by", "how", "what", "i",
+    "my", "we", "you", "your", "their", "its", "may", "each", "some", "but", "not",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [t for t in _WORD_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class CascadeScorer:
+    """Scorer bertingkat dengan statistik per tahap dan confidence terkalibrasi."""
+
+    def __init__(self, rubric_data, domain_terms=(), min_confidence=CASCADE_MIN_CONFIDENCE):
+        self.rubric_data = rubric_data
+        self.min_confidence = min_confidence
+        self.bin_confidence = [{} for _ in range(len(STRENGTH_BINS) - 1)]  # bin -> {prediksi: confidence}
+        self.calibrated = False
+        self.domain_terms = [tuple(tokenize(t)) for t in domain_terms if tokenize(t)]
+        # Satu scorer dibagi semua sesi Streamlit (st.cache_resource)
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+        # Dokumen BM25 = setiap indikator rubrik (level 1-4)
+        self._docs = {}
+        df = Counter()
+        lengths = []
+        for qid, entry in rubric_data.items():
+            for point_str, indicators in entry.get("ideal_points", {}).items():
+                if point_str == "0":
+                    continue
+                for ind in indicators:
+                    tf = Counter(tokenize(ind))
+                    self._docs.setdefault(qid, {}).setdefault(point_str, []).append(tf)
+                    df.update(tf.keys())
+                    lengths.append(sum(tf.values()))
+
+        n_docs = max(1, len(lengths))
+        self._avgdl = (sum(lengths) / n_docs) if lengths else 1.0
+        self._idf = {t: math.log(1 + (n_docs - n + 0.5) / (n + 0.5)) for t, n in df.items()}
+
+    # --- TAHAP LEKSIKAL ---
+    def _bm25(self, query_tf, doc_tf):
+        doc_len = sum(doc_tf.values())
+        score = 0.0
+        for term, qf in query_tf.items():
+            f = doc_tf.get(term)
+            if not f:
+                continue
+            idf = self._idf.get(term, 0.0)
+            score += idf * (f * (BM25_K1 + 1)) / (f + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / self._avgdl))
+        return score
+
+    def _match(self, answer_tf, doc_tf):
+        """Skor BM25 dinormalisasi terhadap skor indikator dengan dirinya sendiri (0..1)."""
+        self_score = self._bm25(doc_tf, doc_tf)
+        if self_score <= 0:
+            return 0.0
+        return min(1.0, self._bm25(answer_tf, doc_tf) / self_score)
+
+    def lexical_features(self, question_id, answer):
+        """Prediksi skor leksikal (meniru logika min hits rubrik) dan kekuatan overlap."""
+        tokens = tokenize(answer)
+        answer_tf = Counter(tokens)
+        docs = self._docs.get(question_id, {})
+
+        matches = {p: [self._match(answer_tf, d) for d in ds] for p, ds in docs.items()}
+
+        predicted = 1
+        for point_str in ["4", "3", "2", "1"]:
+            level = matches.get(point_str)
+            if not level:
+                continue
+            point = int(point_str)
+            hits = sum(1 for m in level if m >= LEXICAL_HIT_THRESHOLD)
+            if point == 4:
+                min_hits = max(1, int(len(level) * 0.6))
+            elif point == 3:
+                min_hits = max(1, int(len(level) * 0.5))
+            else:
+                min_hits = 1
+            if hits >= min_hits:
+                predicted = point
+                break
+
+        top = sorted(matches.get("4", []) + matches.get("3", []), reverse=True)[:3]
+        coverage = float(np.mean(top)) if top else 0.0
+
+        found = 0
+        joined = " " + " ".join(tokens) + " "
+        for term in self.domain_terms:
+            if " " + " ".join(term) + " " in joined:
+                found += 1
+        domain = min(1.0, found / 3.0)
+
+        strength = 0.7 * coverage + 0.3 * domain
+        if strength < OFF_TOPIC_STRENGTH:
+            predicted = 1
+        return predicted, strength
+
+    def _bin(self, strength):
+        for i in range(len(STRENGTH_BINS) - 1):
+            if strength < STRENGTH_BINS[i + 1]:
+                return i
+        return len(STRENGTH_BINS) - 2
+
+    @staticmethod
+    def is_clear_cut(predicted, strength):
+        """Prediksi yang boleh diputuskan tahap leksikal: off-topic (1) atau level 3-4."""
+        return (predicted == 1) if strength < OFF_TOPIC_STRENGTH else (predicted >= 3)
+
+    def lexical_confidence(self, strength, predicted):
+        return self.bin_confidence[self._bin(strength)].get(predicted, 0.0)
+
+    def _count(self, *keys):
+        with self._stats_lock:
+            for key in keys:
+                self.stats[key] += 1
+
+    # --- SCORING ---
+    def score(self, question_id, question_text, answer, model_embedder, bundle=None):
+        """
+        Mengembalikan (score, feedback, stage). Tahap embedding hanya
+        dijalankan jika tahap leksikal tidak cukup yakin.
+        """
+        rubric = self.rubric_data.get(question_id, {}).get("ideal_points", {})
+        a = answer.strip()
+
+        if is_non_relevant(a) or len(a.split()) < MIN_LENGTH_FOR_SCORE:
+            self._count("total", STAGE_RULE)
+            return 0, rubric.get("0", ["Unanswered"])[0], STAGE_RULE
+
+        if self.calibrated:
+            predicted, strength = self.lexical_features(question_id, a)
+            if (self.is_clear_cut(predicted, strength)
+                    and self.lexical_confidence(strength, predicted) >= self.min_confidence):
+                self._count("total", STAGE_LEXICAL)
+                default = "Minimal or Vague Response" if predicted == 1 else f"Score {predicted} achieved"
+                return predicted, rubric.get(str(predicted), [default])[0], STAGE_LEXICAL
+
+        self._count("total", STAGE_EMBEDDING)
+        score, feedback = score_with_rubric(
+            question_id, question_text, a, self.rubric_data, model_embedder, bundle=bundle
+        )
+        return score, feedback, STAGE_EMBEDDING
+
+    def score_batch(self, items, model_embedder, bundle=None):
+        """Re-scoring massal: items berisi (question_id, question_text, answer)."""
+        return [self.score(qid, qtext, ans, model_embedder, bundle=bundle) for qid, qtext, ans in items]
+
+    def stage_report(self):
+        """Jumlah dan persentase jawaban yang diselesaikan tiap tahap."""
+        with self._stats_lock:
+            stats = Counter(self.stats)
+        total = stats["total"] or 1
+        return {
+            stage: {"count": stats[stage], "percent": 100.0 * stats[stage] / total}
+            for stage in (STAGE_RULE, STAGE_LEXICAL, STAGE_EMBEDDING)
+        }
+
+    # --- KALIBRASI ---
+    def calibrate(self, samples):
+        """
+        Mengkalibrasi confidence per (bin kekuatan leksikal, kelas prediksi)
+        dari jawaban berlabel: `samples` berisi (question_id, answer, label)
+        dengan label skor dari penilai manusia. Hanya prediksi clear-cut
+        (yang memang diputuskan tahap leksikal saat scoring) yang dihitung;
+        confidence = proporsi yang sama dengan label. Pasangan dengan sampel
+        < MIN_CALIBRATION_SAMPLES tetap 0 (selalu diteruskan ke embedding).
+        """
+        agree = Counter()
+        seen = Counter()
+        for qid, answer, label in samples:
+            answer = answer.strip()
+            if is_non_relevant(answer) or len(answer.split()) < MIN_LENGTH_FOR_SCORE:
+                continue
+            predicted, strength = self.lexical_features(qid, answer)
+            if not self.is_clear_cut(predicted, strength):
+                continue
+            key = (self._bin(strength), predicted)
+            seen[key] += 1
+            agree[key] += int(predicted == int(label))
+
+        self.bin_confidence = [{} for _ in range(len(STRENGTH_BINS) - 1)]
+        for (b, predicted), n in seen.items():
+            if n >= MIN_CALIBRATION_SAMPLES:
+                self.bin_confidence[b][predicted] = agree[(b, predicted)] / n
+        self.calibrated = True
+        return {key: (n, self.bin_confidence[key[0]].get(key[1], 0.0)) for key, n in sorted(seen.items())}
+
+    def save_calibration(self, path=CALIBRATION_PATH, n_samples=0):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format_version": CALIBRATION_FORMAT_VERSION,
+            "strength_bins": STRENGTH_BINS,
+            # Kunci JSON harus string: {"3": 0.97, ...} per bin
+            "bin_confidence": [{str(p): c for p, c in conf.items()} for conf in self.bin_confidence],
+            "n_samples": n_samples,
+        }
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        print(f"Kalibrasi cascade disimpan: {path}")
+
+    def load_calibration(self, path=CALIBRATION_PATH):
+        """
+        Memuat kalibrasi tersimpan dan mengaktifkan tahap leksikal. Return
+        False (tahap leksikal tetap nonaktif) jika file tidak ada/tidak cocok.
+        """
+        path = Path(path)
+        if not path.exists():
+            print("Kalibrasi cascade tidak ditemukan, tahap leksikal nonaktif.")
+            return False
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Gagal membaca kalibrasi cascade: {e}")
+            return False
+        if (data.get("format_version") != CALIBRATION_FORMAT_VERSION
+                or data.get("strength_bins") != STRENGTH_BINS
+                or len(data.get("bin_confidence", [])) != len(STRENGTH_BINS) - 1):
+            print("Kalibrasi cascade tidak cocok dengan versi ini, tahap leksikal nonaktif.")
+            return False
+        self.bin_confidence = [
+            {int(p): float(c) for p, c in conf.items()} for conf in data["bin_confidence"]
+        ]
+        self.calibrated = True
+        return True
+
+
+def load_labeled_samples(path):
+    """File JSON: list {question_id, answer, score} dengan skor dari penilai."""
+    with open(path, "r", encoding="utf-8") as f:
+        rows = json.load(f)
+    return [(r["question_id"], r["answer"], r["score"]) for r in rows]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m utils.cascade_scorer <labeled_answers.json> [out_path]")
+        sys.exit(1)
+    from utils.stt_processor import ML_TERMS
+
+    rubric_path = Path(__file__).resolve().parent.parent / "data" / "rubric_data.json"
+    with open(rubric_path, "r", encoding="utf-8") as f:
+        rubric = json.load(f)
+    samples = load_labeled_samples(sys.argv[1])
+    scorer = CascadeScorer(rubric, domain_terms=ML_TERMS)
+    for (b, predicted), (n, conf) in scorer.calibrate(samples).items():
+        lo, hi = STRENGTH_BINS[b], STRENGTH_BINS[b + 1]
+        print(f"  bin {lo:.2f}-{hi:.2f} prediksi {predicted}: {n:5d} sampel, confidence {conf:.2f}")
+    scorer.save_calibration(sys.argv[2] if len(sys.argv) > 2 else CALIBRATION_PATH, n_samples=len(samples))
@@ -0,0 +1,169 @@
+# utils/denoise.py
+"""
+Tahap noise reduction opsional (aktif jika DENOISE_ENABLED=true).
+
+Audio diproses per chunk yang saling overlap (memori terbatas, tidak
+memuat seluruh file), memakai profil noise stationary yang diestimasi
+sekali dari diam di awal rekaman. Chunk bisa diproses di worker pool.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from utils.nonverbal_analysis import SILENCE_THRESHOLD_RMS
+
+DENOISE_ENABLED = os.environ.get("DENOISE_ENABLED") == "true"
+DENOISE_WORKERS = int(os.environ.get("DENOISE_WORKERS", 0))  # 0 = proses di thread ini
+DENOISE_PROP_DECREASE = 0.6
+CHUNK_SECONDS = 10.0
+OVERLAP_SECONDS = 0.5
+NOISE_PROFILE_SECONDS = 1.0      # maksimum diam awal yang dipakai sebagai profil
+MIN_NOISE_PROFILE_SECONDS = 0.2  # minimum agar profil dianggap valid
+PROFILE_FRAME_SECONDS = 0.032
+NOISE_PROFILE_CACHE_SIZE = 128
+
+# Cache profil noise per kunci (mis. kandidat / perangkat), dipakai ulang
+# jika rekaman berikutnya tidak punya diam awal yang cukup.
+_noise_profile_cache = OrderedDict()
+_noise_profile_lock = threading.Lock()  # cache dibagi antar sesi (thread)
+
+
+# --- PROFIL NOISE ---
+def estimate_noise_profile(in_wav, max_seconds=NOISE_PROFILE_SECONDS):
+    """
+    Mengambil potongan diam di awal rekaman sebagai profil noise stationary.
+    Hanya `max_seconds` pertama yang dibaca. None jika diam awal terlalu pendek.
+    """
+    with sf.SoundFile(str(in_wav)) as f:
+        sr = f.samplerate
+        head = f.read(int(max_seconds * sr), dtype="float32")
+    if head.ndim > 1:
+        head = head.mean(axis=1)
+
+    frame = max(1, int(PROFILE_FRAME_SECONDS * sr))
+    n_frames = len(head) // frame
+    if n_frames == 0:
+        return None
+
+    rms = np.sqrt(np.mean(head[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    voiced = np.nonzero(rms >= SILENCE_THRESHOLD_RMS)[0]
+    silent_frames = int(voiced[0]) if len(voiced) else n_frames
+
+    noise = head[:silent_frames * frame]
+    if len(noise) < MIN_NOISE_PROFILE_SECONDS * sr:
+        return None
+    return noise
+
+
+def get_noise_profile(noise_wav, profile_key=None):
+    """Profil dari diam awal `noise_wav`; jatuh kembali ke cache per `profile_key`."""
+    noise = estimate_noise_profile(noise_wav)
+
+    if profile_key is not None:
+        with _noise_profile_lock:
+            if noise is not None:
+                _noise_profile_cache[profile_key] = noise
+                _noise_profile_cache.move_to_end(profile_key)
+                while len(_noise_profile_cache) > NOISE_PROFILE_CACHE_SIZE:
+                    _noise_profile_cache.popitem(last=False)
+            else:
+                noise = _noise_profile_cache.get(profile_key)
+
+    return noise
+
+
+# --- CHUNKING ---
+def _iter_chunks(f, chunk_len, overlap_len):
+    """Membaca file per chunk berukuran `chunk_len` dengan overlap `overlap_len`."""
+    hop = chunk_len - overlap_len
+    start = 0
+    while start < f.frames:
+        f.seek(start)
+        data = f.read(chunk_len, dtype="float32")
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+        yield data
+        if start + chunk_len >= f.frames:
+            break
+        start += hop
+
+
+def _denoise_chunk(args):
+    """Worker: noise reduction stationary satu chunk dengan profil yang sama."""
+    import noisereduce as nr
+
+    chunk, sr, noise, prop_decrease = args
+    return nr.reduce_noise(
+        y=chunk, sr=sr, y_noise=noise, stationary=True, prop_decrease=prop_decrease
+    ).astype(np.float32)
+
+
+def _ordered_results(func, items, executor, max_in_flight):
+    """Seperti executor.map, tetapi jumlah chunk yang antre dibatasi (memori tetap)."""
+    pending = []
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_in_flight:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+# --- PIPELINE ---
+def denoise_file(in_wav, out_wav, noise_wav=None, profile_key=None,
+                 prop_decrease=DENOISE_PROP_DECREASE, workers=DENOISE_WORKERS):
+    """
+    Noise reduction per chunk dengan crossfade di area overlap.
+
+    `noise_wav` adalah file sumber profil noise (default: `in_wav`), berguna
+    jika `in_wav` sudah dipotong diam awalnya. Mengembalikan False (tanpa
+    meninggalkan `out_wav`) jika tidak ada profil noise yang bisa dipakai
+    atau noise reduction gagal; pemanggil lanjut dengan audio asli.
+    """
+    try:
+        noise = get_noise_profile(noise_wav or in_wav, profile_key)
+        if noise is None:
+            return False
+
+        with sf.SoundFile(str(in_wav)) as fin:
+            sr = fin.samplerate
+            chunk_len = int(CHUNK_SECONDS * sr)
+            overlap_len = int(OVERLAP_SECONDS * sr)
+            jobs = ((chunk, sr, noise, prop_decrease) for chunk in _iter_chunks(fin, chunk_len, overlap_len))
+
+            with sf.SoundFile(str(out_wav), "w", samplerate=sr, channels=1, subtype="PCM_16") as fout:
+                executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+                try:
+                    if executor is not None:
+                        results = _ordered_results(_denoise_chunk, jobs, executor, max_in_flight=workers * 2)
+                    else:
+                        results = map(_denoise_chunk, jobs)
+
+                    tail = None
+                    for out in results:
+                        if tail is not None:
+                            n = min(len(tail), len(out))
+                            fade = np.linspace(0.0, 1.0, n, dtype=np.float32)
+                            out[:n] = tail[:n] * (1.0 - fade) + out[:n] * fade
+                        if len(out) > overlap_len:
+                            fout.write(out[:len(out) - overlap_len])
+                            tail = out[len(out) - overlap_len:]
+                        else:
+                            fout.write(out)
+                            tail = None
+                    if tail is not None:
+                        fout.write(tail)
+                finally:
+                    if executor is not None:
+                        executor.shutdown()
+        return True
+    except Exception as e:
+        # Tahap opsional: kegagalan tidak boleh menggagalkan jawaban
+        print(f"Noise reduction failed, using original audio: {e}")
+        if os.path.exists(str(out_wav)):
+            os.remove(str(out_wav))
+        return False
@@ -0,0 +1,260 @@
+# utils/duplicate_index.py
+"""
+Indeks MinHash + LSH untuk mendeteksi jawaban yang hampir sama.
+
+Setiap transkrip bersih (hasil `transcribe_and_clean`) diubah menjadi
+shingle 3 kata, lalu signature MinHash. Signature dibagi menjadi band
+LSH sehingga query hanya membandingkan dengan kandidat di bucket yang
+sama (sub-linear), bukan dengan seluruh transkrip. Indeks diperbarui
+setiap kali sebuah jawaban selesai dinilai.
+
+Persistensi inkremental: setiap `add` menambahkan satu record
+(doc_id, namespace, signature, payload) ke log append-only yang diputar
+ulang saat dimuat, jadi tidak ada pickle seluruh indeks di jalur request.
+`python -m utils.duplicate_index --compact` menulis ulang log dari isi indeks.
+"""
+import atexit
+import hashlib
+import os
+import pickle
+import re
+import struct
+import threading
+from pathlib import Path
+
+import numpy as np
+
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS  # threshold LSH efektif ~ (1/16)^(1/8) ~ 0.71
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.8  # estimasi Jaccard untuk ditandai near-duplicate
+REUSE_THRESHOLD = 0.9      # di atas ini skor jawaban sebelumnya dipakai ulang
+MIN_SHINGLES = 5           # jawaban yang terlalu pendek tidak diindeks
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+DUPLICATE_INDEX_PATH = Path(os.environ.get(
+    "DUPLICATE_INDEX_PATH", Path(__file__).resolve().parent.parent / "data" / "duplicate_index.pkl"
+))  # snapshot lama (pickle), tetap dibaca saat migrasi ke log
+DUPLICATE_LOG_PATH = Path(os.environ.get(
+    "DUPLICATE_LOG_PATH", Path(__file__).resolve().parent.parent / "data" / "duplicate_index.log"
+))
+_RECORD_HEADER = struct.Struct("<I")  # panjang record pickle
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Himpunan shingle n-kata dari teks yang dinormalisasi."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash32(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHashLSH:
+    """Indeks MinHash/LSH inkremental, aman dipakai dari beberapa sesi (thread)."""
+
+    def __init__(self, num_perm=NUM_PERM, bands=LSH_BANDS, seed=1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # a, b < 2^31 agar a*x + b tidak overflow uint64 untuk hash 32-bit
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._buckets = [{} for _ in range(bands)]
+        self._entries = {}  # doc_id -> (namespace, signature, payload)
+        self._lock = threading.Lock()
+        self._log = None
+        self._log_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ("_lock", "_log", "_log_lock"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._log = None
+        self._log_lock = threading.Lock()
+
+    # --- SIGNATURE ---
+    def signature(self, text):
+        """Signature MinHash (uint64[num_perm]) atau None jika teks terlalu pendek."""
+        sh = shingles(text)
+        if len(sh) < MIN_SHINGLES:
+            return None
+        hashes = np.fromiter((_hash32(s) for s in sh), dtype=np.uint64, count=len(sh))
+        permuted = (hashes[:, None] * self._a + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _band_keys(self, namespace, signature):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            yield band, (namespace, chunk.tobytes())
+
+    # --- QUERY / UPDATE ---
+    def query(self, text, namespace="", threshold=DUPLICATE_THRESHOLD, signature=None):
+        """
+        Jawaban terindeks yang mirip dengan `text` di namespace yang sama
+        (mis. per pertanyaan): list (doc_id, estimasi_jaccard, payload),
+        terurut dari yang paling mirip.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return []
+
+        with self._lock:
+            candidates = set()
+            for band, key in self._band_keys(namespace, signature):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            results = []
+            for doc_id in candidates:
+                _, other, payload = self._entries[doc_id]
+                similarity = float(np.mean(other == signature))
+                if similarity >= threshold:
+                    results.append((doc_id, similarity, payload))
+
+        results.sort(key=lambda r: r[1], reverse=True)
+        return results
+
+    def add(self, doc_id, text, namespace="", payload=None, signature=None):
+        """Menambahkan jawaban ke indeks. False jika teks terlalu pendek."""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return False
+
+        if not self._insert(doc_id, namespace, signature, payload):
+            return True
+        self._append_log(doc_id, namespace, signature, payload)
+        return True
+
+    def _insert(self, doc_id, namespace, signature, payload):
+        with self._lock:
+            if doc_id in self._entries:
+                return False
+            self._entries[doc_id] = (namespace, signature, payload)
+            for band, key in self._band_keys(namespace, signature):
+                self._buckets[band].setdefault(key, []).append(doc_id)
+        return True
+
+    # --- PERSISTENSI ---
+    def _append_log(self, doc_id, namespace, signature, payload):
+        """Satu record per jawaban; lock indeks tidak dipegang selama I/O."""
+        if self._log is None:
+            return
+        record = pickle.dumps((doc_id, namespace, signature, payload), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._log_lock:
+            self._log.write(_RECORD_HEADER.pack(len(record)) + record)
+            self._log.flush()
+
+    def replay_log(self, path=DUPLICATE_LOG_PATH):
+        """
+        Memutar ulang log ke indeks. Record terakhir yang terpotong (proses
+        mati saat menulis) dibuang dari file agar append berikutnya valid.
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+        count, good_offset = 0, 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_RECORD_HEADER.size)
+                if len(header) < _RECORD_HEADER.size:
+                    break
+                (size,) = _RECORD_HEADER.unpack(header)
+                data = f.read(size)
+                if len(data) < size:
+                    break
+                try:
+                    doc_id, namespace, signature, payload = pickle.loads(data)
+                except Exception:
+                    break
+                self._insert(doc_id, namespace, signature, payload)
+                good_offset = f.tell()
+                count += 1
+        if good_offset < path.stat().st_size:
+            print(f"Duplicate index log {path}: dropping truncated tail")
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+        return count
+
+    def open_log(self, path=DUPLICATE_LOG_PATH):
+        """Mulai menulis setiap `add` ke log append-only di `path`."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.close_log()
+        with self._log_lock:
+            self._log = open(path, "ab")
+        atexit.register(self.close_log)
+
+    def close_log(self):
+        with self._log_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def compact_log(self, path=DUPLICATE_LOG_PATH):
+        """Menulis ulang log dari isi indeks saat ini (satu record per doc_id)."""
+        path = Path(path)
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_path = path.with_name(f".{path.name}.compact.tmp")
+        with open(tmp_path, "wb") as f:
+            for doc_id, (namespace, signature, payload) in entries:
+                record = pickle.dumps((doc_id, namespace, signature, payload), protocol=pickle.HIGHEST_PROTOCOL)
+                f.write(_RECORD_HEADER.pack(len(record)) + record)
+        reopen = self._log is not None
+        self.close_log()
+        os.replace(tmp_path, path)
+        if reopen:
+            self.open_log(path)
+        return len(entries)
+
+
+def load_duplicate_index(path=DUPLICATE_INDEX_PATH, log_path=DUPLICATE_LOG_PATH):
+    """
+    Memuat indeks: snapshot lama (jika ada) lalu log append-only. Setelah
+    dimuat, setiap `add` langsung ditambahkan ke log.
+    """
+    index = None
+    try:
+        if Path(path).exists():
+            with open(path, "rb") as f:
+                index = pickle.load(f)
+    except Exception as e:
+        print(f"Error loading duplicate index snapshot, starting empty: {e}")
+    index = index or MinHashLSH()
+    try:
+        index.replay_log(log_path)
+    except Exception as e:
+        print(f"Error replaying duplicate index log: {e}")
+    index.open_log(log_path)
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or compact the near-duplicate answer index")
+    parser.add_argument("--compact", action="store_true", help="rewrite the log with one record per answer")
+    args = parser.parse_args()
+
+    index = load_duplicate_index()
+    print(f"{len(index)} answers indexed ({DUPLICATE_LOG_PATH})")
+    if args.compact:
+        print(f"Compacted log to {index.compact_log()} records")
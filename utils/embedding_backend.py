@@ -0,0 +1,241 @@
+# utils/embedding_backend.py
+import os
+import platform
+import numpy as np
+
+# Konfigurasi backend embedding
+EMBEDDER_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDER_BACKEND = os.environ.get("EMBEDDER_BACKEND", "torch")  # torch | onnx | onnx_int8
+EMBEDDER_ONNX_DIR = os.environ.get("EMBEDDER_ONNX_DIR", "")
+EMBEDDER_ONNX_INT8_FILE = os.environ.get("EMBEDDER_ONNX_INT8_FILE", "")  # override varian int8
+EMBEDDER_MAX_LENGTH = 256
+
+# File ONNX yang disediakan di repo HuggingFace all-MiniLM-L6-v2
+ONNX_MODEL_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx_int8": None,  # dipilih dari fitur CPU, lihat `select_int8_model_file`
+}
+# Varian int8 per kernel CPU
+ONNX_INT8_VARIANTS = {
+    "avx512_vnni": "onnx/model_qint8_avx512_vnni.onnx",
+    "avx512": "onnx/model_qint8_avx512.onnx",
+    "avx2": "onnx/model_quint8_avx2.onnx",
+    "arm64": "onnx/model_qint8_arm64.onnx",
+}
+
+# Batas toleransi untuk parity check antar backend
+PARITY_COSINE_MIN = 0.99
+PARITY_SIM_ATOL = 0.02
+
+
+# --- UTILITAS ---
+def cos_sim(a, b):
+    """Cosine similarity berbasis numpy (tanpa torch)."""
+    a = np.atleast_2d(np.asarray(a, dtype=np.float32))
+    b = np.atleast_2d(np.asarray(b, dtype=np.float32))
+    a = a / np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+    b = b / np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+    return a @ b.T
+
+
+# --- PEMILIHAN VARIAN INT8 ---
+def _cpu_flags():
+    """Flag CPU dari /proc/cpuinfo (Linux); set kosong jika tidak tersedia."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+def select_int8_model_file(machine=None, flags=None):
+    """
+    Memilih file model int8 sesuai CPU: arm64, AVX512-VNNI, AVX512, atau
+    AVX2 (default x86). Bisa dipaksa lewat EMBEDDER_ONNX_INT8_FILE.
+    """
+    if EMBEDDER_ONNX_INT8_FILE:
+        return EMBEDDER_ONNX_INT8_FILE
+
+    machine = (machine or platform.machine()).lower()
+    if machine in ("arm64", "aarch64"):
+        return ONNX_INT8_VARIANTS["arm64"]
+
+    flags = _cpu_flags() if flags is None else set(flags)
+    if "avx512_vnni" in flags or "avx512vnni" in flags:
+        return ONNX_INT8_VARIANTS["avx512_vnni"]
+    if "avx512f" in flags and "avx512bw" in flags:
+        return ONNX_INT8_VARIANTS["avx512"]
+    return ONNX_INT8_VARIANTS["avx2"]
+
+
+# --- BACKEND ONNX ---
+class OnnxEmbedder:
+    """
+    Embedder berbasis ONNX Runtime (CPU) dengan API `encode` yang sama
+    seperti SentenceTransformer: mean pooling + normalisasi L2.
+    """
+
+    def __init__(self, model_path, tokenizer_path, max_length=EMBEDDER_MAX_LENGTH, num_threads=0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        """Menghasilkan embedding numpy untuk satu kalimat atau list kalimat."""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch(batch)
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feed["token_type_ids"] = np.zeros_like(input_ids)
+
+            token_embeddings = self.session.run(None, feed)[0]
+
+            # Mean pooling dengan attention mask
+            mask = attention_mask[..., None].astype(np.float32)
+            summed = (token_embeddings * mask).sum(axis=1)
+            counts = np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled = summed / counts
+
+            norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            outputs.append((pooled / norms).astype(np.float32))
+
+        if not outputs:
+            return np.zeros((0, 384), dtype=np.float32)
+
+        embeddings = np.vstack(outputs)
+        return embeddings[0] if single else embeddings
+
+
+def _resolve_onnx_files(backend):
+    """Mencari file model ONNX + tokenizer (lokal dulu, lalu HuggingFace Hub)."""
+    model_file = ONNX_MODEL_FILES[backend] or select_int8_model_file()
+
+    if EMBEDDER_ONNX_DIR:
+        model_path = os.path.join(EMBEDDER_ONNX_DIR, model_file)
+        tokenizer_path = os.path.join(EMBEDDER_ONNX_DIR, "tokenizer.json")
+        if os.path.exists(model_path) and os.path.exists(tokenizer_path):
+            return model_path, tokenizer_path
+
+    from huggingface_hub import hf_hub_download
+    model_path = hf_hub_download(EMBEDDER_MODEL_NAME, model_file)
+    tokenizer_path = hf_hub_download(EMBEDDER_MODEL_NAME, "tokenizer.json")
+    return model_path, tokenizer_path
+
+
+# --- LOADER ---
+def load_embedder(backend=None, num_threads=0):
+    """
+    Memuat embedder sesuai backend:
+    - "torch"     : SentenceTransformer full precision (default)
+    - "onnx"      : ONNX Runtime FP32, tanpa import torch
+    - "onnx_int8" : ONNX Runtime dengan bobot int8 terkuantisasi
+    `num_threads=0` = default runtime (semua core).
+    """
+    backend = backend or EMBEDDER_BACKEND
+
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        return SentenceTransformer(EMBEDDER_MODEL_NAME)
+
+    if backend in ONNX_MODEL_FILES:
+        model_path, tokenizer_path = _resolve_onnx_files(backend)
+        return OnnxEmbedder(model_path, tokenizer_path, num_threads=num_threads)
+
+    raise ValueError(f"Unknown embedder backend: {backend}")
+
+
+# --- PARITY CHECK ---
+def check_backend_parity(rubric_data, reference_model, candidate_model, threshold=0.40):
+    """
+    Membandingkan dua backend pada seluruh indikator rubrik.
+
+    Mengembalikan cosine minimum antar embedding (teks yang sama),
+    selisih maksimum similarity antar indikator, dan jumlah pasangan
+    yang keputusan threshold-nya berbeda (yang memengaruhi skor).
+    """
+    texts = []
+    for entry in rubric_data.values():
+        for indicators in entry.get("ideal_points", {}).values():
+            texts.extend(ind.lower() for ind in indicators)
+    texts = list(dict.fromkeys(texts))
+
+    ref = np.asarray(reference_model.encode(texts), dtype=np.float32)
+    cand = np.asarray(candidate_model.encode(texts), dtype=np.float32)
+
+    pairwise = np.diag(cos_sim(ref, cand))
+    ref_sims = cos_sim(ref, ref)
+    cand_sims = cos_sim(cand, cand)
+
+    flips = int(np.sum((ref_sims >= threshold) != (cand_sims >= threshold)))
+    max_sim_diff = float(np.max(np.abs(ref_sims - cand_sims))) if len(texts) else 0.0
+    min_cosine = float(np.min(pairwise)) if len(texts) else 1.0
+
+    return {
+        "num_indicators": len(texts),
+        "min_cosine": min_cosine,
+        "max_sim_diff": max_sim_diff,
+        "threshold_flips": flips,
+        "passed": min_cosine >= PARITY_COSINE_MIN and max_sim_diff <= PARITY_SIM_ATOL and flips == 0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+    from pathlib import Path
+
+    from utils.scoring_logic import check_scoring_parity
+
+    parser = argparse.ArgumentParser(description="Check that an embedding backend scores like torch")
+    parser.add_argument("--backend", default="onnx_int8", choices=sorted(ONNX_MODEL_FILES))
+    parser.add_argument("--reference", default="torch")
+    parser.add_argument("--rubric", default=str(Path(__file__).resolve().parent.parent / "data" / "rubric_data.json"))
+    args = parser.parse_args()
+
+    with open(args.rubric, "r", encoding="utf-8") as f:
+        rubric_data = json.load(f)
+
+    try:
+        reference_model, candidate_model = load_embedder(args.reference), load_embedder(args.backend)
+    except Exception as e:
+        print(f"Could not load embedders: {type(e).__name__}: {e}")
+        sys.exit(2)
+
+    report = check_scoring_parity(rubric_data, reference_model, candidate_model)
+    print(f"{args.backend} vs {args.reference} on {report['num_indicators']} indicators:")
+    print(f"  min cosine        : {report['min_cosine']:.4f} (min {PARITY_COSINE_MIN})")
+    print(f"  max sim diff      : {report['max_sim_diff']:.4f} (max {PARITY_SIM_ATOL})")
+    print(f"  threshold flips   : {report['threshold_flips']}")
+    print(f"  score mismatches  : {len(report['score_mismatches'])}")
+    for qid, answer, ref_score, cand_score in report["score_mismatches"]:
+        print(f"    {qid}: {args.reference}={ref_score} {args.backend}={cand_score} :: {answer[:80]}")
+    print("PASSED" if report["passed"] else "FAILED")
+    sys.exit(0 if report["passed"] else 1)
@@ -0,0 +1,248 @@
+# utils/lexicon_index.py
+"""
+Indeks leksikon symmetric-delete (gaya SymSpell) untuk koreksi kata.
+
+Menggabungkan kamus bahasa Inggris, istilah ML (ML_TERMS) dan target
+PHRASE_MAP dengan prior frekuensi. Semua "delete" sampai jarak edit
+maksimum dihitung sekali saat build, sehingga lookup hanya perlu
+membangkitkan delete dari kata input (jumlahnya terbatas oleh
+`prefix_length`) dan tidak bergantung pada ukuran kosakata.
+
+Seluruh kamus Inggris dianggap kata yang benar (tidak pernah dikoreksi);
+hanya kandidat koreksi yang dibatasi ke MAX_ENGLISH_WORDS kata paling
+sering + istilah domain.
+"""
+import hashlib
+import os
+import pickle
+import re
+from pathlib import Path
+
+from rapidfuzz.distance import OSA
+
+LEXICON_FORMAT_VERSION = 2  # v2: kamus lengkap sebagai kata dikenal, jarak OSA
+MAX_EDIT_DISTANCE = 2
+SHORT_WORD_LENGTH = 4     # kata <= 4 huruf hanya dikoreksi dengan jarak 1
+PREFIX_LENGTH = 7
+MAX_ENGLISH_WORDS = 50000  # kata Inggris paling sering yang menjadi kandidat koreksi
+DOMAIN_FREQUENCY_BOOST = 10.0  # prior istilah domain relatif terhadap kata Inggris paling sering
+
+LEXICON_PATH = Path(os.environ.get(
+    "LEXICON_PATH", Path(__file__).resolve().parent.parent / "data" / "lexicon_index.pkl"
+))
+
+_TOKEN_RE = re.compile(r"^(\W*)(.*?)(\W*)$")
+
+
+def _deletes(word, max_distance):
+    """Semua string hasil menghapus sampai `max_distance` karakter dari `word`."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for w in frontier:
+            if len(w) <= 1:
+                continue
+            for i in range(len(w)):
+                next_frontier.add(w[:i] + w[i + 1:])
+        next_frontier -= results
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+class SymSpellIndex:
+    """Indeks koreksi kata; API `correction` kompatibel dengan SpellChecker."""
+
+    def __init__(self, max_edit_distance=MAX_EDIT_DISTANCE, prefix_length=PREFIX_LENGTH):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.version = None
+        self.frequencies = {}  # kunci (tanpa spasi) -> frekuensi
+        self.outputs = {}      # kunci -> bentuk output (mis. "deeplearning" -> "deep learning")
+        self.domain_terms = set()
+        self.known = frozenset()  # seluruh kamus: kata yang tidak pernah dikoreksi
+        self.deletes = {}      # delete -> list kunci
+
+    def __contains__(self, word):
+        word = word.lower()
+        return word in self.frequencies or word in self.known
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    # --- BUILD ---
+    def add_word(self, term, frequency, domain=False):
+        term = term.lower().strip()
+        key = term.replace(" ", "")
+        if not key:
+            return
+
+        if key in self.frequencies:
+            self.frequencies[key] = max(self.frequencies[key], frequency)
+            if domain:
+                self.outputs[key] = term
+                self.domain_terms.add(key)
+            return
+
+        self.frequencies[key] = frequency
+        self.outputs[key] = term
+        if domain:
+            self.domain_terms.add(key)
+
+        for d in _deletes(key[:self.prefix_length], self.max_edit_distance):
+            self.deletes.setdefault(d, []).append(key)
+
+    # --- LOOKUP ---
+    def lookup(self, word):
+        """
+        Kandidat terbaik untuk `word` (lowercase) sebagai (term, jarak),
+        atau None jika tidak ada kandidat dalam jarak edit maksimum.
+        """
+        word = word.lower()
+        if word in self.frequencies:
+            return self.outputs[word], 0
+        if word in self.known:
+            return word, 0
+
+        max_distance = 1 if len(word) <= SHORT_WORD_LENGTH else self.max_edit_distance
+        prefix = word[:self.prefix_length]
+
+        best = None
+        best_key = None
+        seen = set()
+        for d in _deletes(prefix, max_distance):
+            for key in self.deletes.get(d, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if abs(len(key) - len(word)) > max_distance:
+                    continue
+                # OSA: transposisi ("modle" -> "model") dihitung 1 edit
+                distance = OSA.distance(word, key, score_cutoff=max_distance)
+                if distance > max_distance:
+                    continue
+                rank = (distance, -self.frequencies[key])
+                if best is None or rank < best:
+                    best, best_key = rank, key
+
+        if best_key is None:
+            return None
+        return self.outputs[best_key], best[0]
+
+    def correction(self, word):
+        """Koreksi satu token; tanda baca di awal/akhir dipertahankan."""
+        lead, core, trail = _TOKEN_RE.match(word).groups()
+        if not core or any(ch.isdigit() for ch in core):
+            return word
+        match = self.lookup(core)
+        if match is None:
+            return word
+        return f"{lead}{match[0]}{trail}"
+
+    # --- SERIALISASI ---
+    def save(self, path=LEXICON_PATH):
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=LEXICON_PATH):
+        index = cls.__new__(cls)
+        with open(path, "rb") as f:
+            index.__dict__.update(pickle.load(f))
+        return index
+
+
+def compute_lexicon_version(domain_terms, english_size):
+    h = hashlib.sha256()
+    h.update(f"{LEXICON_FORMAT_VERSION}:{MAX_EDIT_DISTANCE}:{PREFIX_LENGTH}:{english_size}".encode())
+    for term in sorted(domain_terms):
+        h.update(term.encode() + b"\0")
+    return h.hexdigest()[:16]
+
+
+def build_lexicon_index(english_frequencies, domain_terms, max_english_words=MAX_ENGLISH_WORDS):
+    """
+    Membangun indeks dari {kata: frekuensi} bahasa Inggris + list istilah domain.
+    Istilah domain diberi prior frekuensi di atas kata Inggris mana pun.
+    """
+    index = SymSpellIndex()
+    english = sorted(english_frequencies.items(), key=lambda kv: kv[1], reverse=True)[:max_english_words]
+    top_frequency = english[0][1] if english else 1
+
+    for word, frequency in english:
+        if word.isalpha():
+            index.add_word(word, frequency)
+    for term in domain_terms:
+        index.add_word(term, top_frequency * DOMAIN_FREQUENCY_BOOST, domain=True)
+    index.known = frozenset(w.lower() for w in english_frequencies)
+
+    index.version = compute_lexicon_version(domain_terms, len(english_frequencies))
+    return index
+
+
+def load_or_build_lexicon_index(english_frequencies, domain_terms, path=LEXICON_PATH):
+    """Memuat indeks dari disk jika versinya cocok; jika tidak, build lalu simpan."""
+    expected = compute_lexicon_version(domain_terms, len(english_frequencies))
+
+    try:
+        if Path(path).exists():
+            index = SymSpellIndex.load(path)
+            if index.version == expected:
+                return index
+    except Exception as e:
+        print(f"Error loading lexicon index, rebuilding: {e}")
+
+    index = build_lexicon_index(english_frequencies, domain_terms)
+    try:
+        index.save(path)
+    except OSError as e:
+        print(f"Could not save lexicon index: {e}")
+    return index
+
+
+# --- REGRESI ---
+# Kosakata domain + salah ketik umum yang dipakai untuk membandingkan indeks
+# dengan korektor lama (SpellChecker + correct_ml_terms)
+REGRESSION_WORDS = [
+    "classifier", "epochs", "convolution", "pretrained", "embeddings", "dropout",
+    "overfitting", "hyperparameter", "tensorflow", "dataset", "mobilenet", "accuracy",
+    "regularization", "gradient", "neurons", "layers", "validation", "optimizer",
+    "modle", "modl", "trainng", "validaton", "tensorflw", "optimizr",
+]
+
+
+def check_correction_regressions(index, legacy_correct, words=REGRESSION_WORDS):
+    """
+    Membandingkan `index.correction` dengan korektor lama pada `words`.
+    Sebuah kata dianggap regresi jika hasil baru berbeda dari korektor lama,
+    kecuali hasil baru adalah kata itu sendiri (kata dikenal dibiarkan) atau
+    istilah domain.
+    """
+    regressions = []
+    for word in words:
+        new, old = index.correction(word), legacy_correct(word)
+        if new == old:
+            continue
+        key = new.lower().replace(" ", "")
+        if new.lower() == word.lower() and word.lower() in index:
+            continue
+        if key in index.domain_terms:
+            continue
+        regressions.append((word, old, new))
+    return {"checked": len(words), "regressions": regressions, "passed": not regressions}
+
+
+if __name__ == "__main__":
+    from spellchecker import SpellChecker
+    from utils.stt_processor import load_text_models, legacy_correction
+
+    lexicon, english_words = load_text_models()
+    spell = SpellChecker()
+    report = check_correction_regressions(lexicon, lambda w: legacy_correction(w, spell, english_words))
+    for word, old, new in report["regressions"]:
+        print(f"REGRESSION {word!r}: legacy={old!r} index={new!r}")
+    print(f"{report['checked']} words checked, {'passed' if report['passed'] else 'FAILED'}")
@@ -0,0 +1,248 @@
+# utils/live_session.py
+"""
+Rekaman langsung dengan pemrosesan inkremental selama perekaman.
+
+Chunk audio (float32 mono, rate asli mikrofon) dikirim ke `LiveSession.feed`
+selama kandidat berbicara. Sesi ini:
+- menampung chunk pada rate asli dan me-resample per jendela utuh ke
+  SR_RATE, lalu menulis jendela tersebut ke WAV,
+- memperbarui statistik non-verbal (detik bersuara / diam) per frame,
+- memotong audio di jeda alami dan mentranskripsi tiap jendela dengan
+  Whisper di thread latar, sehingga saat "stop" hanya jendela terakhir
+  yang masih perlu diproses,
+- berhenti menerima audio setelah MAX_AUDIO_SECONDS (`capped`).
+
+`simulate_chunk_stream` menghasilkan aliran chunk dari file WAV lokal
+untuk pengujian tanpa browser/mikrofon.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+
+from utils.nonverbal_analysis import SILENCE_THRESHOLD_RMS
+from utils.prescreen import MIN_SPEECH_SECONDS
+from utils.stt_processor import FILLERS, MAX_AUDIO_SECONDS, SR_RATE, clean_text_with_stats
+from utils.word_timings import WordTimings
+
+FRAME_LENGTH = 512            # sampel per frame statistik (32 ms @ 16 kHz, diskalakan ke rate input)
+MIN_WINDOW_SECONDS = 8.0      # jendela minimum sebelum boleh dipotong di jeda
+MAX_WINDOW_SECONDS = 25.0     # jendela dipotong paksa di atas durasi ini
+CUT_SILENCE_SECONDS = 0.6     # jeda yang dianggap batas kalimat
+
+
+def to_mono_float(samples, channels=1):
+    """Mengubah sampel (int16 interleaved / float) menjadi float32 mono."""
+    samples = np.asarray(samples)
+    if samples.dtype == np.int16:
+        samples = samples.astype(np.float32) / 32768.0
+    else:
+        samples = samples.astype(np.float32)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples.reshape(-1)
+
+
+def resample_window(audio, sr, target_sr=SR_RATE):
+    """
+    Resample satu jendela utuh. Jendela dipotong di jeda sehingga efek tepi
+    filter tidak jatuh di tengah ucapan (berbeda dengan resample per chunk
+    kecil yang menimbulkan diskontinuitas tiap ~10-20 ms).
+    """
+    if sr == target_sr:
+        return audio
+    from scipy.signal import resample_poly
+    g = gcd(int(sr), int(target_sr))
+    return resample_poly(audio, target_sr // g, int(sr) // g).astype(np.float32)
+
+
+class LiveSession:
+    """Sesi rekaman langsung dengan statistik dan transkripsi inkremental."""
+
+    def __init__(self, whisper_model, out_wav_path, sr=SR_RATE, max_seconds=MAX_AUDIO_SECONDS):
+        self.whisper_model = whisper_model
+        self.sr = sr                   # rate WAV & Whisper
+        self.input_sr = None           # rate asli chunk (ditentukan chunk pertama)
+        self.max_seconds = max_seconds
+        self.out_wav_path = str(out_wav_path)
+        self._writer = sf.SoundFile(self.out_wav_path, "w", samplerate=sr, channels=1, subtype="PCM_16")
+        self._executor = ThreadPoolExecutor(max_workers=1)  # satu thread: urutan jendela terjaga
+        self._futures = []
+
+        # Statistik dalam detik agar tidak bergantung pada sample rate input
+        self.duration = 0.0
+        self.speech_seconds = 0.0
+        self.silence_seconds = 0.0
+        self._frame_length = FRAME_LENGTH
+        self._frame_rest = np.zeros(0, dtype=np.float32)
+        self._silence_run = 0.0        # detik diam berturut-turut terakhir
+        self._pending = []             # chunk (rate asli) yang belum ditranskripsi
+        self._pending_samples = 0
+        self._pending_voiced = 0
+        self._window_start = 0.0       # detik awal jendela yang sedang dikumpulkan
+        self.capped = False            # batas MAX_AUDIO_SECONDS tercapai, chunk berikutnya diabaikan
+        self.finished = False
+
+    # --- INPUT ---
+    def feed(self, chunk, sr=None):
+        """
+        Menambahkan satu chunk audio mono. Mengembalikan False jika sesi
+        sudah mencapai `max_seconds` (perekaman sebaiknya dihentikan).
+        """
+        if self.finished:
+            raise RuntimeError("Live session already finished")
+        if self.capped:
+            return False
+        chunk = to_mono_float(chunk)
+        sr = int(sr or self.input_sr or self.sr)
+        if sr != self.input_sr:
+            # Rate berubah: tutup jendela lama, frame statistik mengikuti rate baru
+            self._submit_window()
+            self.input_sr = sr
+            self._frame_length = max(1, round(FRAME_LENGTH * sr / self.sr))
+            self._frame_rest = np.zeros(0, dtype=np.float32)
+
+        remaining = int((self.max_seconds - self.duration) * sr)
+        if len(chunk) >= remaining:
+            chunk = chunk[:max(0, remaining)]
+            self.capped = True
+            print(f"Live session reached {self.max_seconds}s, further audio ignored.")
+        if len(chunk):
+            self.duration += len(chunk) / sr
+            self._pending.append(chunk)
+            self._pending_samples += len(chunk)
+            self._update_stats(chunk)
+
+        pending_sec = self._pending_samples / sr
+        at_pause = self._silence_run >= CUT_SILENCE_SECONDS
+        if pending_sec >= MAX_WINDOW_SECONDS or (pending_sec >= MIN_WINDOW_SECONDS and at_pause):
+            self._submit_window()
+        return not self.capped
+
+    def _update_stats(self, chunk):
+        data = np.concatenate([self._frame_rest, chunk])
+        frame_length = self._frame_length
+        n_frames = len(data) // frame_length
+        self._frame_rest = data[n_frames * frame_length:]
+        if n_frames == 0:
+            return
+
+        frame_seconds = frame_length / self.input_sr
+        frames = data[:n_frames * frame_length].reshape(n_frames, frame_length)
+        voiced = np.sqrt(np.mean(frames ** 2, axis=1)) >= SILENCE_THRESHOLD_RMS
+        n_voiced = int(voiced.sum())
+        self.speech_seconds += n_voiced * frame_seconds
+        self.silence_seconds += (n_frames - n_voiced) * frame_seconds
+        self._pending_voiced += n_voiced
+
+        if voiced.all():
+            self._silence_run = 0.0
+        elif not voiced.any():
+            self._silence_run += n_frames * frame_seconds
+        else:
+            self._silence_run = (n_frames - 1 - int(np.nonzero(voiced)[0][-1])) * frame_seconds
+
+    # --- TRANSKRIPSI INKREMENTAL ---
+    def _submit_window(self):
+        if not self._pending:
+            return
+        # Resample per jendela utuh, lalu tulis ke WAV pada rate target
+        audio = resample_window(np.concatenate(self._pending), self.input_sr, self.sr)
+        offset = self._window_start
+        has_speech = self._pending_voiced > 0
+
+        self._writer.write(audio)
+        self._window_start += self._pending_samples / self.input_sr
+        self._pending, self._pending_samples, self._pending_voiced = [], 0, 0
+
+        # Jendela yang seluruhnya diam tidak perlu ke Whisper
+        if has_speech:
+            self._futures.append(self._executor.submit(self._transcribe_window, audio, offset))
+
+    def _transcribe_window(self, audio, offset):
+        segments, _ = self.whisper_model.transcribe(
+            audio, language="en", task="transcribe", beam_size=4,
+            vad_filter=True, word_timestamps=True
+        )
+        segments = list(segments)
+        text = " ".join(seg.text for seg in segments)
+        timings = WordTimings.from_segments(segments, fillers=FILLERS)
+        return text, timings.shifted(offset)
+
+    # --- STATUS ---
+    def live_stats(self):
+        """Statistik sementara untuk ditampilkan selama perekaman."""
+        measured = self.speech_seconds + self.silence_seconds
+        return {
+            "duration": self.duration,
+            "speech_seconds": self.speech_seconds,
+            "pause_percent": (self.silence_seconds / measured) * 100 if measured else 0.0,
+            "windows_submitted": len(self._futures),
+            "windows_done": sum(1 for f in self._futures if f.done()),
+        }
+
+    # --- SELESAI ---
+    def finish(self, spell_checker, english_words):
+        """
+        Menutup sesi: mentranskripsi jendela terakhir, menggabungkan hasil,
+        dan membersihkan teks. Mengembalikan (transcript, word_timings,
+        disfluency, prescreen_status).
+        """
+        if not self.finished:
+            self.finished = True
+            self._submit_window()
+            self._writer.close()
+
+        try:
+            results = [f.result() for f in self._futures]
+        finally:
+            self._executor.shutdown(wait=False)
+
+        if self.duration == 0:
+            status = "empty"
+        elif self.speech_seconds == 0:
+            status = "silent"
+        elif self.speech_seconds < MIN_SPEECH_SECONDS:
+            status = "too_short"
+        else:
+            status = "ok"
+
+        if status != "ok":
+            return "", WordTimings([], [], [], duration=self.duration), None, status
+
+        raw_text = " ".join(text for text, _ in results)
+        word_timings = WordTimings.concatenate([t for _, t in results], duration=self.duration)
+        transcript, disfluency = clean_text_with_stats(raw_text, spell_checker, english_words)
+        return transcript, word_timings, disfluency, status
+
+
+# --- SIMULASI ---
+def simulate_chunk_stream(wav_path, chunk_ms=250, realtime=False):
+    """
+    Menghasilkan chunk float32 mono dari file audio lokal, seolah-olah
+    datang dari mikrofon. `realtime=True` menunggu sesuai durasi chunk.
+    """
+    with sf.SoundFile(str(wav_path)) as f:
+        sr = f.samplerate
+        block = max(1, int(sr * chunk_ms / 1000))
+        for data in f.blocks(blocksize=block, dtype="float32", always_2d=True):
+            yield data.mean(axis=1), sr
+            if realtime:
+                time.sleep(len(data) / sr)
+
+
+def run_simulated_session(wav_path, models, out_wav_path, chunk_ms=250, realtime=False):
+    """
+    Menjalankan LiveSession dengan aliran chunk simulasi. Mengembalikan
+    hasil `finish` dan latensi setelah "stop" (detik).
+    """
+    whisper_model, spell_checker, _, english_words = models
+    session = LiveSession(whisper_model, out_wav_path)
+    for chunk, sr in simulate_chunk_stream(wav_path, chunk_ms=chunk_ms, realtime=realtime):
+        session.feed(chunk, sr)
+
+    stop = time.perf_counter()
+    result = session.finish(spell_checker, english_words)
+    return result, time.perf_counter() - stop
@@ -0,0 +1,463 @@
+# utils/load_test.py
+"""
+Load test sesi interview bersamaan.
+
+Mensimulasikan N kandidat yang berjalan bersamaan melalui alur app.py
+(registrasi -> upload -> proses -> laporan) memakai fungsi pipeline yang
+sebenarnya (`prepare_audio_upload`, `pipeline.process_answer`, duplicate
+index, results store, `build_report` + `render_html`). Setiap sesi adalah
+satu thread, sama seperti Streamlit (satu thread per sesi browser).
+
+Whisper dan embedder bisa diganti stand-in lokal (`--stand-ins`) agar load
+test bisa dijalankan di mesin murah tanpa mengunduh model. Stand-in
+mensimulasikan biaya komputasi (numpy, melepas GIL seperti model asli)
+sebanding dengan durasi audio.
+
+Per tingkat konkurensi dilaporkan: throughput (jawaban/detik), persentil
+latensi jawaban dan sesi, RSS puncak, serta penggunaan disk sementara
+(puncak dan sisa setelah sesi selesai).
+
+    python -m utils.load_test --stand-ins --levels 1,2,4,8 --questions 3
+"""
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from utils.stt_processor import SR_RATE
+from utils.worker_pool import rss_mb
+
+STANDIN_STT_RTF = 0.05        # detik komputasi stand-in Whisper per detik audio
+STANDIN_EMBED_SECONDS = 0.002  # detik komputasi stand-in embedder per teks
+STANDIN_EMBED_DIM = 384        # sama dengan MiniLM
+STANDIN_WORDS_PER_SEC = 2.3
+DEFAULT_LEVELS = [1, 2, 4, 8]
+DEFAULT_ANSWER_SECONDS = 45
+MONITOR_INTERVAL_SEC = 0.2
+PERCENTILES = [50, 90, 95, 99]
+
+SAMPLE_ANSWERS = [
+    "In my last project I used transfer learning with a pretrained convolutional neural network "
+    "and fine tuned the last layers on our dataset. We added dropout and batch normalization to "
+    "reduce overfitting and monitored the validation loss with early stopping.",
+    "Um so overfitting happens when the model memorizes the training data. I usually split the "
+    "data into training validation and testing sets, use regularization, data augmentation and "
+    "compare the training and validation curves to detect it early.",
+    "For deployment we exported the model, wrapped it in an API, and tracked latency and accuracy "
+    "in production. When the data distribution drifted we retrained the model on fresh labelled data.",
+    "I think attention lets the model focus on the most relevant parts of the input sequence. "
+    "Each token computes weights over the other tokens so long range dependencies are easier to learn.",
+    "Uh I am not really sure, I would probably just try a bigger model and see what happens.",
+]
+
+StandInWord = namedtuple("StandInWord", "word start end probability")
+StandInSegment = namedtuple("StandInSegment", "text start end words")
+StandInInfo = namedtuple("StandInInfo", "duration language")
+
+
+# --- STAND-IN MODEL ---
+def _burn(seconds):
+    """Komputasi numpy selama ~`seconds` (melepas GIL seperti inferensi native)."""
+    if seconds <= 0:
+        return
+    a = np.random.rand(192, 192).astype(np.float32)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        a = np.tanh(a @ a)
+
+
+class StandInWhisper:
+    """Pengganti WhisperModel: transkrip kalengan dengan timestamp per kata."""
+
+    def __init__(self, rtf=STANDIN_STT_RTF, answers=SAMPLE_ANSWERS):
+        self.rtf = rtf
+        self.answers = answers
+
+    def transcribe(self, audio, **kwargs):
+        if isinstance(audio, (str, Path)):
+            duration = sf.info(str(audio)).duration
+            key = Path(audio).name
+        else:
+            audio = np.asarray(audio)
+            duration = len(audio) / SR_RATE
+            key = str(len(audio))
+        _burn(duration * self.rtf)
+
+        text = self.answers[zlib.crc32(key.encode()) % len(self.answers)]
+        tokens = text.split()
+        n_words = max(1, min(len(tokens), int(duration * STANDIN_WORDS_PER_SEC)))
+        step = duration / n_words
+        words = [
+            StandInWord(" " + tokens[i % len(tokens)], i * step, i * step + step * 0.8, 0.9)
+            for i in range(n_words)
+        ]
+        segment_text = " ".join(w.word.strip() for w in words)
+        segments = [StandInSegment(segment_text, 0.0, duration, words)]
+        return iter(segments), StandInInfo(duration, "en")
+
+
+class StandInEmbedder:
+    """Pengganti SentenceTransformer: vektor hashing bag-of-words ter-normalisasi."""
+
+    def __init__(self, dim=STANDIN_EMBED_DIM, seconds_per_text=STANDIN_EMBED_SECONDS):
+        self.dim = dim
+        self.seconds_per_text = seconds_per_text
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            vec[zlib.crc32(token.encode()) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        _burn(self.seconds_per_text * len(batch))
+        embeddings = np.stack([self._embed(t) for t in batch]) if batch else np.zeros((0, self.dim), np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load_shared(stand_ins=False):
+    """Data read-only (leksikon, bank soal, scorer); induk worker pool memuat hanya ini."""
+    from utils.worker_pool import load_shared_data
+    if not stand_ins:
+        return load_shared_data()
+
+    from utils.stt_processor import load_text_models, ML_TERMS
+    from utils.cascade_scorer import CascadeScorer
+    from utils.question_bank import QuestionBank
+    from utils.rubric_bundle import QUESTIONS_PATH, RUBRIC_PATH
+
+    # Embedding bundle berasal dari model asli, tidak cocok dengan stand-in
+    bank = QuestionBank.from_files(QUESTIONS_PATH, RUBRIC_PATH)
+    scorer = CascadeScorer(bank.rubric, domain_terms=ML_TERMS)
+    scorer.load_calibration()
+    return {"text_models": load_text_models(), "scorer": scorer, "question_bank": bank}
+
+
+def init_models(shared, threads=0, stand_ins=False, stt_rtf=STANDIN_STT_RTF):
+    """Memuat Whisper + embedder (asli atau stand-in) ke `shared`; initializer worker pool."""
+    from utils.worker_pool import init_pipeline_worker
+    if not stand_ins:
+        init_pipeline_worker(shared, threads)
+        return
+    embedder_model = StandInEmbedder()
+    spell_checker, english_words = shared["text_models"]
+    shared["question_bank"].embedder = embedder_model
+    shared["models"] = (StandInWhisper(rtf=stt_rtf), spell_checker, embedder_model, english_words)
+
+
+def load_resources(stand_ins=False, stt_rtf=STANDIN_STT_RTF):
+    """Model + scorer + bank soal, sama seperti yang di-cache app.py."""
+    shared = load_shared(stand_ins)
+    init_models(shared, stand_ins=stand_ins, stt_rtf=stt_rtf)
+    return shared
+
+
+# --- AUDIO SINTETIS ---
+def synth_answer_wav(seconds=DEFAULT_ANSWER_SECONDS, seed=0, sr=SR_RATE):
+    """WAV (bytes) berisi "suku kata" noise termodulasi dengan jeda, lolos pre-screen."""
+    rng = np.random.RandomState(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+    envelope = (np.sin(2 * np.pi * 3.0 * t) > -0.2).astype(np.float32)   # ~3 suku kata/detik
+    pauses = rng.rand(int(seconds) + 1) < 0.15                            # beberapa jeda 1 detik
+    envelope *= ~pauses[t.astype(int)]
+    y = (0.1 * rng.randn(n) * envelope + 0.002 * rng.randn(n)).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, y, sr, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+class SimulatedUpload(io.BytesIO):
+    """Meniru UploadedFile Streamlit (`name`, `getbuffer()`)."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.type = "audio/wav"
+
+
+# --- MONITOR RESOURCE ---
+def _dir_bytes(path):
+    total = 0
+    for p in Path(path).rglob("*"):
+        try:
+            if p.is_file():
+                total += p.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+class ResourceMonitor:
+    """Thread latar yang mencatat RSS (induk + memori privat worker pool) dan ukuran direktori temp."""
+
+    def __init__(self, temp_root, pool=None, interval=MONITOR_INTERVAL_SEC):
+        self.temp_root = temp_root
+        self.pool = pool
+        self.interval = interval
+        self.rss_samples = []
+        self.disk_samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-test-monitor", daemon=True)
+
+    def _rss(self):
+        total = rss_mb() or 0.0
+        if self.pool is not None:
+            # Halaman model dibagi CoW dengan induk: hitung hanya memori privat worker
+            stats = self.pool.stats()
+            for private, rss in zip(stats["worker_private_mb"], stats["worker_rss_mb"]):
+                total += private if private is not None else (rss or 0.0)
+        return total
+
+    def _run(self):
+        while True:
+            self.rss_samples.append(self._rss())
+            self.disk_samples.append(_dir_bytes(self.temp_root))
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# --- SESI ---
+def _process_in_pool(pool, audio_path, question, candidate, answer_index, results_store, stage_timings,
+                     denoise):
+    """Mode pool: pipeline di worker, state bersama (duplicate index / store) di induk."""
+    from utils.worker_pool import process_answer_job
+    from utils.results_store import build_result_row
+
+    result = pool.submit(process_answer_job, str(audio_path), question, candidate, denoise=denoise).result()
+    result["stage_timings"] = dict(stage_timings, **result["stage_timings"])
+    answer_index.add(
+        result["answer_id"], result["transcript"], namespace=question["key"],
+        payload={"score": result["score"], "feedback": result["feedback"], "candidate": candidate["email"]},
+    )
+    results_store.append(build_result_row(
+        result["answer_id"], candidate["email"], question["key"], result["score"], result["confidence"],
+        nonverbal=result["nonverbal"], scoring_stage=result["scoring_stage"],
+        prescreen_status=result["prescreen_status"], stage_timings=result["stage_timings"],
+        candidate_name=candidate["name"], feedback=result["feedback"], transcript=result["transcript"],
+    ))
+    return result
+
+
+def run_session(session_id, resources, answer_index, results_store, temp_root, n_questions,
+                answer_seconds, pool=None, denoise=None):
+    """Satu kandidat: registrasi -> upload + proses tiap pertanyaan -> laporan."""
+    from utils.denoise import DENOISE_ENABLED
+    from utils.pipeline import process_answer
+    from utils.report_export import build_report, render_html
+    from utils.stt_processor import prepare_audio_upload
+
+    denoise = DENOISE_ENABLED if denoise is None else denoise
+    session_start = time.perf_counter()
+    temp_dir = Path(temp_root) / f"session_{session_id}"
+    temp_dir.mkdir(parents=True, exist_ok=True)
+
+    # Registrasi
+    candidate = {"name": f"Load Test {session_id}", "email": f"loadtest{session_id}@example.com",
+                 "position": "ML Engineer"}
+    interview = resources["question_bank"].sample_interview(n_questions, role="ml_engineer", seed=session_id)
+
+    answer_latencies, answers = [], []
+    for q_num, question in interview.items():
+        # Upload -> proses
+        start = time.perf_counter()
+        upload = SimulatedUpload(
+            synth_answer_wav(answer_seconds, seed=session_id * 100 + int(q_num)),
+            name=f"answer_{session_id}_{q_num}.wav",
+        )
+        stage_timings = {}
+        upload_start = time.perf_counter()
+        audio_path, _ = prepare_audio_upload(upload, temp_dir)
+        stage_timings["upload"] = time.perf_counter() - upload_start
+
+        if pool is not None:
+            result = _process_in_pool(pool, audio_path, question, candidate, answer_index,
+                                      results_store, stage_timings, denoise)
+        else:
+            result = process_answer(
+                audio_path, question, resources["models"], resources["scorer"], candidate=candidate,
+                question_bank=resources["question_bank"], answer_index=answer_index,
+                results_store=results_store, stage_timings=stage_timings, denoise=denoise,
+            )
+        answer_latencies.append(time.perf_counter() - start)
+        answers.append({
+            "question_key": q_num, "question": result["question"], "score": result["score"],
+            "confidence": result["confidence"], "feedback": result["feedback"],
+            "delivery": result["nonverbal"].get("qualitative_summary"), "transcript": result["transcript"],
+        })
+
+    # Laporan
+    render_html(build_report(candidate, answers))
+    return {
+        "answer_latencies": answer_latencies,
+        "session_latency": time.perf_counter() - session_start,
+        "residual_bytes": _dir_bytes(temp_dir),
+    }
+
+
+def _percentiles(values):
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    return {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+
+
+def run_level(concurrency, resources, n_questions=3, answer_seconds=DEFAULT_ANSWER_SECONDS,
+              sessions=None, pool=None, denoise=None, keep_temp=False):
+    """Menjalankan `sessions` sesi (default = konkurensi) dengan `concurrency` sesi bersamaan."""
+    from utils.duplicate_index import MinHashLSH
+    from utils.results_store import ResultsStore
+
+    sessions = sessions or concurrency
+    temp_root = Path(tempfile.mkdtemp(prefix=f"loadtest_c{concurrency}_"))
+    answer_index = MinHashLSH()
+    results_store = ResultsStore(root=temp_root / "results")
+
+    answer_latencies, session_latencies, errors = [], [], []
+    residual_bytes = 0
+    try:
+        with ResourceMonitor(temp_root, pool=pool) as monitor:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as executor:
+                futures = [
+                    executor.submit(run_session, i, resources, answer_index, results_store, temp_root,
+                                    n_questions, answer_seconds, pool, denoise)
+                    for i in range(sessions)
+                ]
+                for future in futures:
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        errors.append(f"{type(e).__name__}: {e}")
+                        continue
+                    answer_latencies.extend(outcome["answer_latencies"])
+                    session_latencies.append(outcome["session_latency"])
+                    residual_bytes += outcome["residual_bytes"]
+            wall = time.perf_counter() - start
+        results_store.flush()
+    finally:
+        if not keep_temp:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "answers": len(answer_latencies),
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "wall_seconds": wall,
+        "throughput_answers_per_sec": len(answer_latencies) / wall if wall else 0.0,
+        "answer_latency": _percentiles(answer_latencies),
+        "session_latency": _percentiles(session_latencies),
+        "rss_peak_mb": max(monitor.rss_samples, default=0.0),
+        "rss_mean_mb": float(np.mean(monitor.rss_samples)) if monitor.rss_samples else 0.0,
+        "temp_peak_mb": max(monitor.disk_samples, default=0) / (1024 * 1024),
+        "temp_residual_mb": residual_bytes / (1024 * 1024),
+    }
+
+
+def _fmt(value):
+    return f"{value:7.2f}" if value is not None else "      -"
+
+
+def format_table(results):
+    header = (f"{'conc':>4} {'ans':>5} {'err':>4} {'ans/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} "
+              f"{'sess p95':>9} {'RSS pk':>8} {'tmp pk':>8} {'tmp left':>8}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lat = r["answer_latency"]
+        lines.append(
+            f"{r['concurrency']:>4} {r['answers']:>5} {r['errors']:>4} "
+            f"{r['throughput_answers_per_sec']:>7.2f} {_fmt(lat['p50'])} {_fmt(lat['p95'])} {_fmt(lat['p99'])} "
+            f"{_fmt(r['session_latency']['p95']):>9} {r['rss_peak_mb']:>7.0f}M "
+            f"{r['temp_peak_mb']:>7.1f}M {r['temp_residual_mb']:>7.1f}M"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load test concurrent interview sessions")
+    parser.add_argument("--levels", default=",".join(map(str, DEFAULT_LEVELS)),
+                        help="comma separated concurrency levels, e.g. 1,2,4,8")
+    parser.add_argument("--sessions-per-level", type=int, default=None,
+                        help="sessions per level (default: equal to the concurrency)")
+    parser.add_argument("--questions", type=int, default=3, help="questions per session")
+    parser.add_argument("--answer-seconds", type=float, default=DEFAULT_ANSWER_SECONDS)
+    parser.add_argument("--stand-ins", action="store_true",
+                        help="use local stand-ins instead of Whisper and the embedder")
+    parser.add_argument("--stt-rtf", type=float, default=STANDIN_STT_RTF,
+                        help="stand-in Whisper compute seconds per audio second")
+    parser.add_argument("--pool-workers", type=int, default=0,
+                        help="process answers in a warm worker pool with this many workers")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured warm-up sessions before the first level")
+    parser.add_argument("--no-denoise", action="store_true")
+    parser.add_argument("--keep-temp", action="store_true", help="keep temp directories for inspection")
+    parser.add_argument("--json", default=None, help="write results to this JSON file")
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.levels.split(",") if x.strip()]
+    denoise = False if args.no_denoise else None
+    pool = None
+    if args.pool_workers:
+        from utils.worker_pool import WarmWorkerPool, shared_resources
+        # Induk hanya memuat data bersama; model dimuat di tiap worker setelah fork
+        pool = WarmWorkerPool(
+            partial(load_shared, stand_ins=args.stand_ins),
+            initializer=partial(init_models, stand_ins=args.stand_ins, stt_rtf=args.stt_rtf),
+            workers=args.pool_workers,
+        ).start()
+        print(f"Shared data loaded in {pool.load_seconds:.1f}s")
+        resources = shared_resources()
+    else:
+        load_start = time.perf_counter()
+        resources = load_resources(stand_ins=args.stand_ins, stt_rtf=args.stt_rtf)
+        print(f"Loaded models in {time.perf_counter() - load_start:.1f}s")
+
+    results = []
+    try:
+        if args.warmup:
+            # JIT / cache pertama (librosa, leksikon, embedding rubrik) tidak ikut diukur
+            warmup = run_level(1, resources, n_questions=args.questions, answer_seconds=args.answer_seconds,
+                               sessions=args.warmup, pool=pool, denoise=denoise)
+            print(f"Warm-up: {warmup['answers']} answers in {warmup['wall_seconds']:.1f}s")
+        for level in levels:
+            result = run_level(level, resources, n_questions=args.questions, answer_seconds=args.answer_seconds,
+                               sessions=args.sessions_per_level, pool=pool, denoise=denoise,
+                               keep_temp=args.keep_temp)
+            results.append(result)
+            print(f"concurrency {level}: {result['answers']} answers, "
+                  f"{result['throughput_answers_per_sec']:.2f} answers/s, {result['errors']} errors")
+            for error in result["error_samples"]:
+                print(f"  error: {error}")
+    finally:
+        if pool is not None:
+            print(f"Pool: {pool.stats()}")
+            pool.shutdown()
+
+    print()
+    print(format_table(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
@@ -3,11 +3,17 @@ import numpy as np
 import os
 
 # --- THRESHOLDS ---
-TEMPO_FAST = 150.0
+TEMPO_FAST = 150.0  # beat BPM librosa (fallback tanpa timestamp kata)
 TEMPO_SLOW = 125.0
-PAUSE_TOO_MUCH_PERCENT = 45.0
+WPM_FAST = 170.0    # words per minute dari timestamp kata
+WPM_SLOW = 100.0
+PAUSE_TOO_MUCH_PERCENT = 45.0  # rasio frame RMS diam (fallback librosa)
 PAUSE_MINIMAL_PERCENT = 35.0
+GAP_PAUSE_TOO_MUCH_PERCENT = 25.0  # jeda antar kata >= PAUSE_MIN_GAP_SEC (timestamp kata)
+GAP_PAUSE_MINIMAL_PERCENT = 10.0
 SILENCE_THRESHOLD_RMS = 0.015
+PAUSE_MIN_GAP_SEC = 0.5  # jeda antar kata yang dihitung sebagai pause
+DISFLUENCY_HIGH_PERCENT = 10.0
 
 def interpret_tempo(bpm):
     """Interpretasi kualitatif tempo."""
@@ -18,6 +24,15 @@ def interpret_tempo(bpm):
     else:
         return "slow"
 
+def interpret_speech_rate(wpm):
+    """Interpretasi kualitatif kecepatan bicara (words per minute)."""
+    if wpm > WPM_FAST:
+        return "too fast"
+    elif wpm >= WPM_SLOW:
+        return "steady"
+    else:
+        return "slow"
+
 def interpret_pause_by_percent(pause_percent):
     """Interpretasi kualitatif jeda."""
     if pause_percent > PAUSE_TOO_MUCH_PERCENT:
@@ -27,8 +42,92 @@ def interpret_pause_by_percent(pause_percent):
     else:
         return "normal pauses"
 
-def analyze_non_verbal(file_path):
-    """Menganalisis audio untuk Tempo dan Jeda."""
+def interpret_gap_pause(pause_percent):
+    """Interpretasi kualitatif jeda dari timestamp kata (hanya jeda panjang)."""
+    if pause_percent > GAP_PAUSE_TOO_MUCH_PERCENT:
+        return "too many pauses"
+    elif pause_percent <= GAP_PAUSE_MINIMAL_PERCENT:
+        return "minimal pauses"
+    else:
+        return "normal pauses"
+
+def interpret_disfluency(disfluency_rate):
+    """Interpretasi kualitatif disfluency (filler, pengulangan, restart)."""
+    if disfluency_rate > DISFLUENCY_HIGH_PERCENT:
+        return "frequent disfluencies"
+    return None
+
+def add_disfluency_metrics(result, disfluency):
+    """Menambahkan statistik disfluency dari tahap pembersihan teks ke hasil delivery."""
+    rate = disfluency.get("disfluency_rate", 0.0)
+    result["filler_count"] = disfluency.get("filler_count", result.get("filler_count", 0))
+    result["repetition_count"] = disfluency.get("repetition_count", 0)
+    result["restart_count"] = disfluency.get("restart_count", 0)
+    result["disfluency_percent"] = f"{rate:.2f}%"
+
+    disfluency_qualitative = interpret_disfluency(rate)
+    if disfluency_qualitative and "qualitative_summary" in result:
+        result["qualitative_summary"] += f", {disfluency_qualitative}"
+    return result
+
+def analyze_word_timings(timings):
+    """
+    Menghitung metrik delivery langsung dari timestamp kata (WordTimings):
+    words per minute, lokasi pause, dan densitas filler. Tidak perlu memuat
+    audio lagi.
+    """
+    total_duration = timings.duration
+    num_words = len(timings)
+
+    # Speech rate dalam words per minute (bukan beat BPM seperti fallback librosa)
+    wpm = (num_words / total_duration) * 60.0 if total_duration > 0 else 0.0
+
+    # Pause = jeda antar kata + diam sebelum kata pertama / setelah kata terakhir
+    gaps = timings.gaps()
+    long_gaps = np.nonzero(gaps >= PAUSE_MIN_GAP_SEC)[0]
+    pause_locations = [
+        (round(float(timings.ends[i]), 2), round(float(gaps[i]), 2)) for i in long_gaps
+    ]
+    total_pause = float(np.sum(gaps[long_gaps]))
+    if num_words:
+        total_pause += float(timings.starts[0])
+        total_pause += max(0.0, total_duration - float(timings.ends[-1]))
+    else:
+        total_pause = total_duration
+
+    pause_percentage = (total_pause / total_duration) * 100 if total_duration > 0 else 0.0
+
+    filler_count = int(np.sum(timings.is_filler))
+    filler_density = (filler_count / num_words) * 100 if num_words else 0.0
+
+    rate_qualitative = interpret_speech_rate(wpm)
+    pause_qualitative = interpret_gap_pause(pause_percentage)
+    summary = f"{rate_qualitative} pace and {pause_qualitative}"
+
+    return {
+        "words_per_minute": f"{wpm:.2f}",
+        "total_pause_seconds": f"{total_pause:.2f}",
+        "pause_percent": f"{pause_percentage:.2f}%",
+        "pause_locations": pause_locations,
+        "filler_count": filler_count,
+        "filler_per_100_words": f"{filler_density:.2f}",
+        "qualitative_summary": summary,
+        "total_duration": f"{total_duration:.2f}"
+    }
+
+def analyze_non_verbal(file_path, word_timings=None, disfluency=None):
+    """
+    Menganalisis audio untuk Tempo dan Jeda.
+    Jika `word_timings` dari tahap STT tersedia, metrik dihitung dari
+    timestamp kata tanpa memuat audio lagi. `disfluency` (statistik dari
+    `clean_text_with_stats`) ikut dimasukkan ke metrik delivery.
+    """
+    if word_timings is not None:
+        try:
+            result = analyze_word_timings(word_timings)
+            return add_disfluency_metrics(result, disfluency) if disfluency else result
+        except Exception as e:
+            print(f"Word timing analysis failed, falling back to audio: {e}")
 
     try:
         y, sr = librosa.load(file_path, sr=16000)
@@ -54,13 +153,14 @@ def analyze_non_verbal(file_path):
         pause_qualitative = interpret_pause_by_percent(pause_percentage)
         summary = f"{tempo_qualitative} tempo and {pause_qualitative}"
 
-        return {
+        result = {
             "tempo_bpm": f"{tempo:.2f}",
             "total_pause_seconds": f"{total_silent_time_sec:.2f}",
             "pause_percent": f"{pause_percentage:.2f}%",
             "qualitative_summary": summary,
             "total_duration": f"{total_duration:.2f}"
         }
+        return add_disfluency_metrics(result, disfluency) if disfluency else result
 
     except Exception as e:
         return {
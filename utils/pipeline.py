@@ -0,0 +1,186 @@
+# utils/pipeline.py
+"""
+Pipeline pemrosesan satu jawaban, tanpa ketergantungan ke UI Streamlit.
+
+    prepare_audio_upload -> prescreen -> (denoise) -> STT -> non-verbal -> scoring
+
+Dipakai oleh app.py (upload maupun rekaman langsung) dan bisa dipanggil
+dari proses lain (worker, skrip batch) dengan model yang sama.
+"""
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from utils.stt_processor import transcribe_with_timings
+from utils.nonverbal_analysis import analyze_non_verbal
+from utils.scoring_logic import compute_confidence_score
+from utils.prescreen import prescreen_audio
+from utils.denoise import DENOISE_ENABLED, denoise_file
+from utils.word_timings import WordTimings
+from utils.duplicate_index import REUSE_THRESHOLD
+from utils.results_store import build_result_row
+
+
+@contextmanager
+def timed(stage_timings, name):
+    """Mencatat durasi (detik) sebuah tahap ke `stage_timings[name]`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_timings[name] = time.perf_counter() - start
+
+
+def _notify(on_progress, message, percent):
+    if on_progress is not None:
+        on_progress(message, percent)
+
+
+# --- TAHAP STT ---
+def transcribe_stage(audio_path, models, stage_timings, profile_key=None,
+                     denoise=DENOISE_ENABLED, on_progress=None):
+    """
+    Pre-screen, noise reduction opsional, dan transkripsi.
+    Mengembalikan (transcript, word_timings, disfluency, prescreen).
+    """
+    whisper_model, spell_checker, _, english_words = models
+    audio_path = Path(audio_path)
+
+    # Pre-screen (lewati Whisper untuk upload kosong/diam)
+    _notify(on_progress, "🔍 Checking audio...", 25)
+    with timed(stage_timings, "prescreen"):
+        prescreen = prescreen_audio(
+            str(audio_path), trimmed_path=audio_path.with_name(audio_path.stem + "_trimmed.wav")
+        )
+
+    if prescreen["skip_stt"]:
+        word_timings = WordTimings([], [], [], duration=prescreen["duration"])
+        return "", word_timings, None, prescreen
+
+    stt_path = prescreen["audio_path"]
+
+    # Noise reduction opsional (profil noise dari diam awal file asli)
+    if denoise:
+        _notify(on_progress, "🎧 Reducing background noise...", 35)
+        with timed(stage_timings, "denoise"):
+            denoised_path = audio_path.with_name(audio_path.stem + "_denoised.wav")
+            if denoise_file(stt_path, denoised_path, noise_wav=str(audio_path), profile_key=profile_key):
+                if stt_path != str(audio_path):
+                    os.remove(stt_path)
+                stt_path = str(denoised_path)
+
+    _notify(on_progress, "🗣️ Transcribing your response...", 40)
+    with timed(stage_timings, "stt"):
+        try:
+            transcript, word_timings, disfluency = transcribe_with_timings(
+                stt_path, whisper_model, spell_checker, english_words
+            )
+        finally:
+            if stt_path != str(audio_path):
+                os.remove(stt_path)
+
+    if prescreen["audio_path"] != str(audio_path):
+        # Kembalikan timestamp ke timeline audio asli (sebelum trim)
+        word_timings = word_timings.shifted(prescreen["time_offset"], duration=prescreen["duration"])
+
+    return transcript, word_timings, disfluency, prescreen
+
+
+# --- TAHAP ANALISIS + SCORING ---
+def score_stage(transcript, word_timings, disfluency, audio_path, question, models, scorer,
+                stage_timings, candidate=None, question_bank=None, answer_index=None,
+                results_store=None, prescreen_status="ok", on_progress=None):
+    """
+    Analisis non-verbal, confidence, deteksi near-duplicate, dan scoring
+    cascade. Hasil ditambahkan ke results store jika diberikan.
+    """
+    candidate = candidate or {}
+    embedder_model = models[2]
+    question_key = question["key"]
+    question_text = question["question"]
+    candidate_email = candidate.get("email", "")
+
+    # Non-verbal dari timestamp kata
+    _notify(on_progress, "📊 Analyzing speech patterns...", 60)
+    with timed(stage_timings, "nonverbal"):
+        nonverbal = analyze_non_verbal(str(audio_path), word_timings=word_timings, disfluency=disfluency)
+
+    _notify(on_progress, "📝 Evaluating your answer...", 70)
+    with timed(stage_timings, "scoring"):
+        confidence = compute_confidence_score(transcript, disfluency=disfluency)
+
+        # Cek near-duplicate terhadap jawaban yang sudah dinilai
+        duplicates, near_duplicate_of, signature = [], [], None
+        if answer_index is not None:
+            signature = answer_index.signature(transcript)
+            duplicates = answer_index.query(transcript, namespace=question_key, signature=signature)
+            near_duplicate_of = [
+                doc_id for doc_id, _, payload in duplicates
+                if payload.get("candidate") != candidate_email
+            ]
+
+        if duplicates and duplicates[0][1] >= REUSE_THRESHOLD:
+            # Pakai ulang skor jawaban yang (hampir) identik
+            reused = duplicates[0][2]
+            score, feedback, scoring_stage = reused["score"], reused["feedback"], "duplicate"
+        else:
+            # Lexical prefilter, embedding hanya jika ambigu
+            score, feedback, scoring_stage = scorer.score(
+                question_key, question_text, transcript, embedder_model, bundle=question_bank
+            )
+
+        answer_id = f"{candidate_email}:{question_key}:{datetime.now().isoformat()}"
+        if answer_index is not None:
+            # Persisten lewat log append-only indeks (satu record, tanpa snapshot)
+            answer_index.add(
+                answer_id, transcript, namespace=question_key, signature=signature,
+                payload={"score": score, "feedback": feedback, "candidate": candidate_email}
+            )
+
+    # Simpan ke results store kolumnar (analitik lintas kandidat)
+    if results_store is not None:
+        results_store.append(build_result_row(
+            answer_id, candidate_email, question_key, score, confidence,
+            nonverbal=nonverbal, scoring_stage=scoring_stage,
+            near_duplicate=bool(near_duplicate_of),
+            prescreen_status=prescreen_status, stage_timings=stage_timings,
+            candidate_name=candidate.get("name"), feedback=feedback, transcript=transcript
+        ))
+
+    _notify(on_progress, "✅ Done", 100)
+    return {
+        "answer_id": answer_id,
+        "transcript": transcript,
+        "word_timings": word_timings,
+        "disfluency": disfluency,
+        "nonverbal": nonverbal,
+        "prescreen_status": prescreen_status,
+        "score": score,
+        "confidence": confidence,
+        "feedback": feedback,
+        "scoring_stage": scoring_stage,
+        "near_duplicate_of": near_duplicate_of,
+        "stage_timings": stage_timings,
+        "question": question_text,
+    }
+
+
+def process_answer(audio_path, question, models, scorer, candidate=None, question_bank=None,
+                   answer_index=None, results_store=None, stage_timings=None,
+                   denoise=DENOISE_ENABLED, on_progress=None):
+    """Pipeline lengkap untuk satu file WAV jawaban."""
+    stage_timings = stage_timings if stage_timings is not None else {}
+    candidate = candidate or {}
+
+    transcript, word_timings, disfluency, prescreen = transcribe_stage(
+        audio_path, models, stage_timings, profile_key=candidate.get("email"),
+        denoise=denoise, on_progress=on_progress
+    )
+    return score_stage(
+        transcript, word_timings, disfluency, audio_path, question, models, scorer,
+        stage_timings, candidate=candidate, question_bank=question_bank,
+        answer_index=answer_index, results_store=results_store,
+        prescreen_status=prescreen["status"], on_progress=on_progress
+    )
@@ -0,0 +1,101 @@
+# utils/prescreen.py
+"""
+Pre-screening audio sebelum STT.
+
+Pass energi (RMS) yang murah untuk mendeteksi upload kosong / diam / terlalu
+pendek sehingga Whisper bisa dilewati, serta memotong diam di awal dan akhir
+rekaman sebelum transkripsi.
+"""
+import librosa
+import numpy as np
+import soundfile as sf
+
+from utils.nonverbal_analysis import SILENCE_THRESHOLD_RMS
+
+PRESCREEN_SR = 16000
+PRESCREEN_FRAME_LENGTH = 2048
+PRESCREEN_HOP_LENGTH = 512
+MIN_SPEECH_SECONDS = 1.5  # total frame bersuara minimum agar layak ditranskripsi
+TRIM_PADDING_SEC = 0.25   # sisa diam yang dipertahankan di sekitar ucapan
+
+STATUS_OK = "ok"
+STATUS_EMPTY = "empty"
+STATUS_SILENT = "silent"
+STATUS_TOO_SHORT = "too_short"
+
+
+def voiced_frames(y, threshold=SILENCE_THRESHOLD_RMS):
+    """Mask boolean frame yang energinya di atas threshold diam."""
+    rms = librosa.feature.rms(
+        y=y, frame_length=PRESCREEN_FRAME_LENGTH, hop_length=PRESCREEN_HOP_LENGTH
+    )[0]
+    return rms >= threshold
+
+
+def prescreen_signal(y, sr=PRESCREEN_SR):
+    """
+    Menilai sinyal mono: status, durasi, detik bersuara, dan batas
+    (start, end) dalam sampel setelah diam awal/akhir dipotong.
+    """
+    duration = len(y) / sr if sr else 0.0
+    result = {
+        "status": STATUS_OK,
+        "duration": duration,
+        "speech_seconds": 0.0,
+        "trim_start": 0,
+        "trim_end": len(y),
+    }
+
+    if len(y) == 0:
+        result["status"] = STATUS_EMPTY
+        return result
+
+    voiced = voiced_frames(y)
+    frame_duration = PRESCREEN_HOP_LENGTH / sr
+    result["speech_seconds"] = float(np.sum(voiced)) * frame_duration
+
+    if not voiced.any():
+        result["status"] = STATUS_SILENT
+        return result
+
+    if result["speech_seconds"] < MIN_SPEECH_SECONDS:
+        result["status"] = STATUS_TOO_SHORT
+        return result
+
+    voiced_idx = np.nonzero(voiced)[0]
+    padding = int(TRIM_PADDING_SEC * sr)
+    start = max(0, int(voiced_idx[0]) * PRESCREEN_HOP_LENGTH - padding)
+    end = min(len(y), (int(voiced_idx[-1]) * PRESCREEN_HOP_LENGTH + PRESCREEN_FRAME_LENGTH) + padding)
+    result["trim_start"] = start
+    result["trim_end"] = end
+    return result
+
+
+def prescreen_audio(file_path, trimmed_path=None):
+    """
+    Pre-screen file audio. Jika layak ditranskripsi dan `trimmed_path`
+    diberikan, audio yang sudah dipotong ditulis ke sana (WAV 16 kHz mono).
+
+    Mengembalikan dict hasil `prescreen_signal` ditambah:
+    - "skip_stt"    : True jika Whisper tidak perlu dijalankan
+    - "audio_path"  : path yang dipakai untuk STT
+    - "time_offset" : detik yang dipotong di awal (untuk menggeser timestamp kata)
+    """
+    try:
+        y, sr = librosa.load(file_path, sr=PRESCREEN_SR, mono=True)
+    except Exception as e:
+        raise RuntimeError(f"Pre-screening failed: {e}")
+
+    result = prescreen_signal(y, sr)
+    result["skip_stt"] = result["status"] != STATUS_OK
+    result["audio_path"] = str(file_path)
+    result["time_offset"] = result["trim_start"] / sr
+
+    trimmed = result["trim_start"] > 0 or result["trim_end"] < len(y)
+    if not result["skip_stt"] and trimmed_path is not None and trimmed:
+        sf.write(trimmed_path, y[result["trim_start"]:result["trim_end"]], sr)
+        result["audio_path"] = str(trimmed_path)
+    else:
+        result["time_offset"] = 0.0
+
+    return result
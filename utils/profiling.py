@@ -0,0 +1,211 @@
+# utils/profiling.py
+"""
+Profiling per request (opt-in, hanya saat DEBUG_MODE=true).
+
+Sebuah request (pemrosesan satu jawaban) diprofil jika:
+- dipilih secara acak sesuai PROFILE_SAMPLE_PERCENT, atau
+- sesi ditandai untuk diprofil (mis. `?profile=1` di URL aplikasi).
+
+Untuk request yang diprofil disimpan ke PROFILE_DIR:
+- `<nama>.cpu.folded`   : profil CPU statistik (sampling stack thread
+  pemroses setiap PROFILE_INTERVAL_MS), format "folded stacks" yang bisa
+  langsung dibuka di speedscope atau diproses flamegraph.pl,
+- `<nama>.alloc.folded` : profil alokasi (tracemalloc), stack berbobot
+  byte yang masih teralokasi di akhir request,
+- `<nama>.txt`          : ringkasan fungsi terpanas dan alokasi terbesar.
+
+PERHATIAN: tracemalloc bersifat global per proses. Selama satu request
+diprofil, SEMUA sesi Streamlit lain yang berjalan bersamaan ikut di-trace
+(lebih lambat, sebanding dengan PROFILE_ALLOC_FRAMES) dan alokasinya ikut
+masuk ke `.alloc.folded` request ini. Ringkasan mencatat jumlah thread
+lain yang aktif. Di server yang ramai gunakan PROFILE_SAMPLE_PERCENT kecil,
+atau PROFILE_ALLOC=false untuk profil CPU saja (sampling stack hanya
+menyentuh thread pemroses).
+"""
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+DEBUG_MODE = os.environ.get("DEBUG_MODE") == "true"
+PROFILE_SAMPLE_PERCENT = float(os.environ.get("PROFILE_SAMPLE_PERCENT", 0))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+PROFILE_ALLOC = os.environ.get("PROFILE_ALLOC", "true") == "true"
+PROFILE_ALLOC_FRAMES = int(os.environ.get("PROFILE_ALLOC_FRAMES", 10))  # kedalaman traceback (biaya seluruh proses)
+PROFILE_DIR = Path(os.environ.get(
+    "PROFILE_DIR", Path(__file__).resolve().parent.parent / "data" / "profiles"
+))
+SUMMARY_TOP_N = 25
+
+# tracemalloc bersifat global per proses: satu profil aktif sekaligus
+_active_lock = threading.Lock()
+
+
+def should_profile(session_requested=False, debug=None, sample_percent=None):
+    """Menentukan apakah request ini diprofil."""
+    debug = DEBUG_MODE if debug is None else debug
+    sample_percent = PROFILE_SAMPLE_PERCENT if sample_percent is None else sample_percent
+    if not debug:
+        return False
+    return bool(session_requested) or random.random() * 100 < sample_percent
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Profiler CPU statistik: sampling stack satu thread dari thread latar."""
+
+    def __init__(self, thread_id=None, interval_ms=PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, n=SUMMARY_TOP_N):
+        """Fungsi dengan self time terbesar (frame teratas di stack)."""
+        own = Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        return own.most_common(n)
+
+
+def _alloc_folded(snapshot):
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__, all_frames=True),  # thread sampler sendiri
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    stats = snapshot.statistics("traceback")
+    lines = []
+    for stat in stats:
+        # Traceback terurut dari frame terluar ke terdalam
+        stack = ";".join(f"{os.path.basename(f.filename)}:{f.lineno}" for f in stat.traceback)
+        lines.append(f"{stack} {stat.size}\n")
+    return "".join(lines), stats
+
+
+class ProfileResult:
+    """Lokasi file hasil profil dan ringkasannya."""
+
+    def __init__(self, name):
+        self.name = name
+        self.cpu_path = None
+        self.alloc_path = None
+        self.summary_path = None
+        self.wall_seconds = 0.0
+        self.samples = 0
+        self.peak_alloc_mb = 0.0
+        self.other_threads = 0  # thread lain yang aktif (alokasinya ikut ter-trace)
+
+
+@contextmanager
+def profile_request(name="request", enabled=True, out_dir=PROFILE_DIR, alloc=None):
+    """
+    Context manager profil satu request. Yield `ProfileResult` (path diisi
+    setelah blok selesai) atau None jika tidak diprofil / profil lain aktif.
+    `alloc=None` mengikuti PROFILE_ALLOC; profil alokasi mencakup seluruh proses.
+    """
+    alloc = PROFILE_ALLOC if alloc is None else alloc
+    if not enabled or not _active_lock.acquire(blocking=False):
+        yield None
+        return
+
+    result = ProfileResult(name)
+    started_tracing = False
+    sampler = None
+    try:
+        if alloc and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_ALLOC_FRAMES)
+            started_tracing = True
+        sampler = StackSampler().start()
+        # Tanpa thread sampler dan thread pemroses sendiri
+        result.other_threads = max(0, threading.active_count() - 2)
+        start = time.perf_counter()
+        try:
+            yield result
+        finally:
+            result.wall_seconds = time.perf_counter() - start
+            sampler.stop()
+            snapshot = tracemalloc.take_snapshot() if alloc and tracemalloc.is_tracing() else None
+            if snapshot is not None:
+                result.peak_alloc_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            if started_tracing:
+                tracemalloc.stop()
+            _write_profile(result, sampler, snapshot, Path(out_dir))
+    finally:
+        _active_lock.release()
+
+
+def _write_profile(result, sampler, snapshot, out_dir):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in result.name)
+    base = str(out_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{safe_name}")
+    result.samples = sampler.samples
+
+    result.cpu_path = Path(base + ".cpu.folded")
+    result.cpu_path.write_text(sampler.folded(), encoding="utf-8")
+
+    summary = [
+        f"request: {result.name}",
+        f"wall time: {result.wall_seconds:.3f}s",
+        f"cpu samples: {sampler.samples} (every {sampler.interval * 1000:.1f} ms)",
+        "",
+        "top functions (self samples):",
+    ]
+    summary += [f"  {count:6d}  {label}" for label, count in sampler.top_functions()]
+
+    if snapshot is not None:
+        folded, stats = _alloc_folded(snapshot)
+        result.alloc_path = Path(base + ".alloc.folded")
+        result.alloc_path.write_text(folded, encoding="utf-8")
+        summary += [
+            "",
+            "allocations are PROCESS-WIDE (tracemalloc): they include every thread that ran during",
+            f"this request ({result.other_threads} other threads were active at start)",
+            f"peak traced memory: {result.peak_alloc_mb:.1f} MB",
+            "largest live allocations:",
+        ]
+        for stat in stats[:SUMMARY_TOP_N]:
+            frame = stat.traceback[-1]
+            summary.append(f"  {stat.size / 1024:10.1f} KiB  {frame.filename}:{frame.lineno}")
+
+    result.summary_path = Path(base + ".txt")
+    result.summary_path.write_text("\n".join(summary) + "\n", encoding="utf-8")
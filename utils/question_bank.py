@@ -0,0 +1,151 @@
+# utils/question_bank.py
+"""
+Bank pertanyaan terindeks untuk bank besar (ribuan pertanyaan lintas role).
+
+Format entri pertanyaan (questions.json):
+    {"question": "...", "key": "q1", "role": "ml_engineer", "topics": ["cnn"]}
+`role` dan `topics` opsional. Embedding indikator rubrik dimuat lazy per
+pertanyaan, sehingga memori bertambah sesuai ukuran interview, bukan bank.
+"""
+import json
+import random
+import threading
+from collections import OrderedDict, defaultdict
+
+DEFAULT_ROLE = "general"
+NUM_INTERVIEW_QUESTIONS = 5
+EMBEDDING_CACHE_SIZE = 256  # jumlah (pertanyaan, level) yang disimpan di memori
+
+
+class QuestionBank:
+    """Indeks pertanyaan per key, role, dan topik + API sampling interview."""
+
+    def __init__(self, questions, rubric=None, bundle=None, embedder=None):
+        # `questions` bisa dict {"1": {...}} (format lama) atau list entri
+        entries = questions.values() if isinstance(questions, dict) else questions
+
+        self.rubric = rubric or {}
+        self.bundle = bundle
+        self.embedder = embedder
+
+        self._order = []
+        self._by_key = {}
+        self._by_role = defaultdict(list)
+        self._by_topic = defaultdict(list)
+        self._embedding_cache = OrderedDict()
+        self._cache_lock = threading.Lock()  # bank dibagi antar sesi (thread)
+
+        for entry in entries:
+            key = entry["key"]
+            if key in self._by_key:
+                continue
+            self._order.append(key)
+            self._by_key[key] = entry
+            self._by_role[entry.get("role", DEFAULT_ROLE).lower()].append(key)
+            for topic in entry.get("topics", []):
+                self._by_topic[topic.lower()].append(key)
+
+    @classmethod
+    def from_files(cls, questions_path, rubric_path, **kwargs):
+        with open(questions_path, "r") as f:
+            questions = json.load(f)
+        with open(rubric_path, "r") as f:
+            rubric = json.load(f)
+        return cls(questions, rubric, **kwargs)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    # --- LOOKUP ---
+    def get(self, key):
+        return self._by_key.get(key)
+
+    def roles(self):
+        return sorted(self._by_role)
+
+    def topics(self):
+        return sorted(self._by_topic)
+
+    def keys_for(self, role=None, topics=None):
+        """Key pertanyaan yang cocok dengan role dan salah satu topik (jika diberikan)."""
+        if role is not None:
+            keys = self._by_role.get(role.lower(), [])
+        else:
+            keys = self._order
+
+        if topics:
+            wanted = set()
+            for topic in topics:
+                wanted.update(self._by_topic.get(topic.lower(), []))
+            keys = [k for k in keys if k in wanted]
+
+        return list(keys)
+
+    # --- SAMPLING ---
+    def sample_interview(self, n=NUM_INTERVIEW_QUESTIONS, role=None, topics=None,
+                         seed=None, shuffle=False):
+        """
+        Membangun interview berisi `n` pertanyaan acak dari bank.
+
+        Hasilnya berformat sama seperti questions.json ({"1": {...}, ...}).
+        Jika role/topik tidak punya kandidat, jatuh kembali ke seluruh bank.
+        Urutan bank dipertahankan kecuali `shuffle=True`.
+        """
+        candidates = self.keys_for(role, topics)
+        if not candidates and role is not None:
+            candidates = self.keys_for(None, topics)
+        if not candidates:
+            candidates = list(self._order)
+
+        rng = random.Random(seed)
+        picked = rng.sample(candidates, min(n, len(candidates)))
+        if not shuffle:
+            position = {k: i for i, k in enumerate(self._order)}
+            picked.sort(key=position.__getitem__)
+
+        return OrderedDict(
+            (str(i), dict(self._by_key[key])) for i, key in enumerate(picked, start=1)
+        )
+
+    # --- EMBEDDING RUBRIK (LAZY) ---
+    def indicator_embeddings(self, question_id, point_str):
+        """
+        Embedding indikator rubrik untuk (pertanyaan, level), dimuat saat
+        pertama kali dibutuhkan. Kompatibel dengan parameter `bundle`
+        pada `score_with_rubric`.
+        """
+        if self.bundle is not None:
+            embeddings = self.bundle.indicator_embeddings(question_id, point_str)
+            if embeddings is not None:
+                return embeddings
+
+        cache_key = (question_id, point_str)
+        with self._cache_lock:
+            if cache_key in self._embedding_cache:
+                self._embedding_cache.move_to_end(cache_key)
+                return self._embedding_cache[cache_key]
+
+        indicators = self.rubric.get(question_id, {}).get("ideal_points", {}).get(point_str)
+        if not indicators or self.embedder is None:
+            return None
+
+        # Encode di luar lock; dua sesi bisa meng-encode bersamaan, hasilnya identik
+        embeddings = self.embedder.encode([ind.lower() for ind in indicators])
+        with self._cache_lock:
+            self._embedding_cache[cache_key] = embeddings
+            while len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+        return embeddings
+
+    def release(self, keys=None):
+        """Membuang cache embedding (semua, atau hanya untuk key tertentu)."""
+        with self._cache_lock:
+            if keys is None:
+                self._embedding_cache.clear()
+                return
+            keys = set(keys)
+            for cache_key in [ck for ck in self._embedding_cache if ck[0] in keys]:
+                del self._embedding_cache[cache_key]
@@ -0,0 +1,285 @@
+# utils/report_export.py
+"""
+Ekspor laporan kandidat.
+
+- Laporan per kandidat (HTML, atau PDF jika extra `reports` / reportlab
+  terpasang) dari template yang di-cache.
+- Ekspor massal CSV / JSONL yang di-stream baris per baris dari results
+  store, tanpa memuat seluruh data ke memori.
+- Render laporan ribuan kandidat di worker pool.
+"""
+import csv
+import html
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from string import Template
+
+EXPORT_COLUMNS = [
+    "answer_id", "candidate_email", "candidate_name", "question_key", "answered_at",
+    "score", "confidence", "scoring_stage", "near_duplicate", "words_per_minute",
+    "pause_percent", "filler_count", "total_duration", "feedback",
+]
+REPORT_COLUMNS = [
+    "answer_id", "candidate_email", "candidate_name", "question_key", "answered_at",
+    "score", "confidence", "feedback", "transcript", "words_per_minute", "pause_percent",
+]
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", os.cpu_count() or 1))
+CANDIDATES_PER_SCAN = 500  # kandidat per scan store saat render massal
+STRONG_CANDIDATE_PERCENT = 70
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "assets" / "report_templates"
+
+
+# --- TEMPLATE ---
+@lru_cache(maxsize=None)
+def load_template(name):
+    """Template di-parse sekali per proses (termasuk di setiap worker)."""
+    return Template((TEMPLATE_DIR / name).read_text(encoding="utf-8"))
+
+
+def build_report(candidate, answers, questions=None):
+    """
+    Struktur laporan satu kandidat.
+    `answers`: list dict dengan kunci question_key, score, confidence, feedback, ...
+    `questions`: dict opsional {question_key: teks pertanyaan}.
+    """
+    questions = questions or {}
+    answers = sorted(answers, key=lambda a: str(a.get("question_key", "")))
+    total = sum(a.get("score") or 0 for a in answers)
+    overall = (total / (len(answers) * 4)) * 100 if answers else 0.0
+    return {
+        "name": candidate.get("name") or "",
+        "email": candidate.get("email") or "",
+        "position": candidate.get("position") or "",
+        "overall_score": overall,
+        "recommendation": "Strong Candidate" if overall >= STRONG_CANDIDATE_PERCENT else "Needs Improvement",
+        "evaluation_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "answers": [
+            dict(a, question=a.get("question") or questions.get(a.get("question_key"), a.get("question_key")))
+            for a in answers
+        ],
+    }
+
+
+def _delivery_text(answer):
+    if answer.get("delivery"):
+        return str(answer["delivery"])
+    if answer.get("words_per_minute") is not None:
+        return f"{answer['words_per_minute']:.0f} words/min"
+    return "-"
+
+
+def render_html(report):
+    """Render laporan kandidat ke HTML."""
+    row_template = load_template("answer_row.html")
+    rows = "".join(
+        row_template.substitute(
+            question=html.escape(str(a.get("question") or "")),
+            score=a.get("score") if a.get("score") is not None else "-",
+            confidence=f"{(a.get('confidence') or 0):.0%}",
+            delivery=html.escape(_delivery_text(a)),
+            feedback=html.escape(str(a.get("feedback") or "")),
+            transcript=html.escape(str(a.get("transcript") or "")),
+        )
+        for a in report["answers"]
+    )
+    return load_template("candidate_report.html").substitute(
+        name=html.escape(report["name"]),
+        email=html.escape(report["email"]),
+        position=html.escape(report["position"] or "N/A"),
+        overall_score=f"{report['overall_score']:.1f}",
+        recommendation=report["recommendation"],
+        evaluation_date=report["evaluation_date"],
+        questions_completed=len(report["answers"]),
+        rows=rows,
+    )
+
+
+def render_pdf(report):
+    """Render laporan kandidat ke PDF (butuh reportlab)."""
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+    except ImportError:
+        raise RuntimeError("PDF export requires the 'reportlab' package (pip install '.[reports]')")
+
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    story = [
+        Paragraph("Interview Report", styles["Title"]),
+        Paragraph(f"<b>Name:</b> {html.escape(report['name'])}", styles["Normal"]),
+        Paragraph(f"<b>Email:</b> {html.escape(report['email'])}", styles["Normal"]),
+        Paragraph(f"<b>Overall Score:</b> {report['overall_score']:.1f}%", styles["Normal"]),
+        Paragraph(f"<b>Recommendation:</b> {report['recommendation']}", styles["Normal"]),
+        Paragraph(f"<b>Evaluation Date:</b> {report['evaluation_date']}", styles["Normal"]),
+        Spacer(1, 12),
+    ]
+    for a in report["answers"]:
+        story.append(Paragraph(html.escape(str(a.get("question") or "")), styles["Heading3"]))
+        story.append(Paragraph(
+            f"Score: {a.get('score')}/4 &nbsp; Confidence: {(a.get('confidence') or 0):.0%}",
+            styles["Normal"],
+        ))
+        story.append(Paragraph(html.escape(str(a.get("feedback") or "")), styles["Normal"]))
+        story.append(Spacer(1, 8))
+
+    SimpleDocTemplate(buffer, pagesize=A4).build(story)
+    return buffer.getvalue()
+
+
+def pdf_available():
+    try:
+        import reportlab  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# --- EKSPOR MASSAL (STREAMING) ---
+def _iter_rows(store, columns, **filters):
+    store.flush()  # baris yang masih di buffer proses ini ikut terbaca
+    for batch in store.iter_batches(columns, **filters):
+        yield from batch.to_pylist()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_csv(store, columns=EXPORT_COLUMNS, **filters):
+    """Generator potongan teks CSV (header lalu satu baris per jawaban)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in _iter_rows(store, columns, **filters):
+        writer.writerow([row.get(c) for c in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_jsonl(store, columns=EXPORT_COLUMNS, **filters):
+    """Generator baris JSONL, satu jawaban per baris."""
+    for row in _iter_rows(store, columns, **filters):
+        yield json.dumps(row, default=_json_default, ensure_ascii=False) + "\n"
+
+
+def export_to_file(chunks, path):
+    """Menulis generator `iter_csv` / `iter_jsonl` ke file tanpa buffering penuh."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return path
+
+
+# --- RENDER MASSAL ---
+def _safe_filename(value):
+    return re.sub(r"[^A-Za-z0-9_.@-]+", "_", value) or "candidate"
+
+
+def _render_job(args):
+    """Worker: render satu kandidat dan tulis ke disk."""
+    report, out_dir, fmt = args
+    path = Path(out_dir) / f"{_safe_filename(report['email'])}.{fmt}"
+    if fmt == "pdf":
+        path.write_bytes(render_pdf(report))
+    else:
+        path.write_text(render_html(report), encoding="utf-8")
+    return str(path)
+
+
+def _answer_order(row):
+    return (row.get("answered_at") or datetime.min, row.get("answer_id") or "")
+
+
+def _iter_candidate_reports(store, questions, candidates=None, **filters):
+    """Laporan per kandidat, dibangun per kelompok kandidat agar memori terbatas."""
+    if candidates is None:
+        seen = set()
+        for batch in store.iter_batches(["candidate_email"], **filters):
+            seen.update(batch.column(0).to_pylist())
+        candidates = sorted(c for c in seen if c)
+
+    candidates = list(candidates)
+    for start in range(0, len(candidates), CANDIDATES_PER_SCAN):
+        group = candidates[start:start + CANDIDATES_PER_SCAN]
+        # Jawaban ulang (retry) untuk pertanyaan yang sama: hanya yang terbaru
+        by_candidate = {}
+        for row in _iter_rows(store, REPORT_COLUMNS, candidates=group, **filters):
+            latest = by_candidate.setdefault(row["candidate_email"], {})
+            current = latest.get(row["question_key"])
+            if current is None or _answer_order(row) > _answer_order(current):
+                latest[row["question_key"]] = row
+        for email in group:
+            answers = list(by_candidate.get(email, {}).values())
+            if answers:
+                candidate = {"email": email, "name": max(answers, key=_answer_order).get("candidate_name")}
+                yield build_report(candidate, answers, questions)
+
+
+def render_bulk_reports(store, out_dir, questions=None, fmt="html", candidates=None,
+                        workers=REPORT_WORKERS, **filters):
+    """
+    Render laporan semua kandidat (atau `candidates`) ke `out_dir` di worker
+    pool. Mengembalikan generator path file yang selesai (urutan kandidat).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = ((report, str(out_dir), fmt) for report in _iter_candidate_reports(store, questions, candidates, **filters))
+
+    if workers <= 1:
+        yield from map(_render_job, jobs)
+        return
+
+    max_in_flight = workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for job in jobs:
+            pending.append(executor.submit(_render_job, job))
+            if len(pending) >= max_in_flight:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.results_store import ResultsStore
+    from utils.question_bank import QuestionBank
+    from utils.rubric_bundle import QUESTIONS_PATH, RUBRIC_PATH
+
+    parser = argparse.ArgumentParser(description="Export candidate results and reports")
+    parser.add_argument("format", choices=["csv", "jsonl", "html", "pdf"])
+    parser.add_argument("output", help="output file (csv/jsonl) or directory (html/pdf)")
+    parser.add_argument("--question", default=None)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS)
+    args = parser.parse_args()
+
+    store = ResultsStore()
+    filters = {"question_key": args.question, "start_date": args.start, "end_date": args.end}
+
+    if args.format == "csv":
+        export_to_file(iter_csv(store, **filters), args.output)
+    elif args.format == "jsonl":
+        export_to_file(iter_jsonl(store, **filters), args.output)
+    else:
+        bank = QuestionBank.from_files(QUESTIONS_PATH, RUBRIC_PATH)
+        questions = {key: bank.get(key)["question"] for key in bank.keys_for()}
+        count = 0
+        for _ in render_bulk_reports(store, args.output, questions, fmt=args.format,
+                                     workers=args.workers, **filters):
+            count += 1
+        print(f"Rendered {count} reports to {args.output}")
@@ -0,0 +1,303 @@
+# utils/results_store.py
+"""
+Penyimpanan hasil kolumnar (Parquet, dipartisi per pertanyaan dan tanggal).
+
+Setiap jawaban yang dinilai ditambahkan sebagai satu baris (skor, confidence,
+metrik non-verbal numerik, durasi tiap tahap). Baris ditampung di buffer dan
+ditulis per batch. Analitik membaca hanya kolom/partisi yang dibutuhkan
+sehingga agregasi ratusan ribu baris tetap cepat.
+"""
+import atexit
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+RESULTS_DIR = Path(os.environ.get(
+    "RESULTS_DIR", Path(__file__).resolve().parent.parent / "data" / "results"
+))
+FLUSH_EVERY = 50  # jumlah baris di buffer sebelum ditulis ke Parquet
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("RESULTS_FLUSH_INTERVAL", 30))  # umur maksimal baris di buffer
+COMPACT_MAX_SMALL_FILES = 8           # file kecil per partisi sebelum digabung otomatis
+COMPACT_SMALL_FILE_BYTES = 8 << 20    # file di bawah ukuran ini dianggap kecil
+
+STAGE_NAMES = ["upload", "prescreen", "denoise", "stt", "nonverbal", "scoring"]
+
+RESULTS_SCHEMA = pa.schema(
+    [
+        ("answer_id", pa.string()),
+        ("candidate_email", pa.string()),
+        ("candidate_name", pa.string()),
+        ("answered_at", pa.timestamp("ms")),
+        ("score", pa.int8()),
+        ("confidence", pa.float32()),
+        ("scoring_stage", pa.string()),
+        ("near_duplicate", pa.bool_()),
+        ("prescreen_status", pa.string()),
+        ("words_per_minute", pa.float32()),
+        ("pause_percent", pa.float32()),
+        ("total_pause_seconds", pa.float32()),
+        ("total_duration", pa.float32()),
+        ("filler_count", pa.int32()),
+        ("repetition_count", pa.int32()),
+        ("restart_count", pa.int32()),
+        ("feedback", pa.string()),
+        ("transcript", pa.string()),
+    ]
+    + [(f"t_{name}", pa.float32()) for name in STAGE_NAMES]
+)
+PARTITION_SCHEMA = pa.schema([("question_key", pa.string()), ("date", pa.string())])
+
+
+def _to_float(value):
+    """Metrik non-verbal disimpan sebagai string ('12.34%'); ubah ke float."""
+    if value is None:
+        return None
+    try:
+        return float(str(value).rstrip("%"))
+    except ValueError:
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def build_result_row(answer_id, candidate_email, question_key, score, confidence,
+                     nonverbal=None, scoring_stage=None, near_duplicate=False,
+                     prescreen_status=None, stage_timings=None, answered_at=None,
+                     candidate_name=None, feedback=None, transcript=None):
+    """Menyusun satu baris hasil dari data yang dihasilkan pipeline."""
+    nonverbal = nonverbal or {}
+    stage_timings = stage_timings or {}
+    answered_at = answered_at or datetime.now()
+    row = {
+        "answer_id": answer_id,
+        "candidate_email": candidate_email,
+        "candidate_name": candidate_name,
+        "question_key": question_key,
+        "date": answered_at.strftime("%Y-%m-%d"),
+        "answered_at": answered_at,
+        "score": score,
+        "confidence": confidence,
+        "scoring_stage": scoring_stage,
+        "near_duplicate": bool(near_duplicate),
+        "prescreen_status": prescreen_status,
+        "words_per_minute": _to_float(nonverbal.get("words_per_minute")),  # tempo_bpm (librosa) bukan WPM
+        "pause_percent": _to_float(nonverbal.get("pause_percent")),
+        "total_pause_seconds": _to_float(nonverbal.get("total_pause_seconds")),
+        "total_duration": _to_float(nonverbal.get("total_duration")),
+        "filler_count": _to_int(nonverbal.get("filler_count")),
+        "repetition_count": _to_int(nonverbal.get("repetition_count")),
+        "restart_count": _to_int(nonverbal.get("restart_count")),
+        "feedback": feedback,
+        "transcript": transcript,
+    }
+    for name in STAGE_NAMES:
+        row[f"t_{name}"] = stage_timings.get(name)
+    return row
+
+
+class ResultsStore:
+    """Append-only store Parquet dengan partisi question_key/date."""
+
+    def __init__(self, root=RESULTS_DIR, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.root = Path(root)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._compact_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    # --- TULIS ---
+    def append(self, row):
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) < self.flush_every:
+                # Baris tidak boleh tertahan lebih lama dari flush_interval
+                # (proses lain, mis. ekspor laporan, hanya melihat file Parquet)
+                if self._timer is None and self.flush_interval:
+                    self._timer = threading.Timer(self.flush_interval, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            rows, self._buffer = self._take_buffer()
+        self._write(rows)
+
+    def _take_buffer(self):
+        """Dipanggil dengan _lock dipegang."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return self._buffer, []
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._take_buffer()
+        if rows:
+            self._write(rows)
+
+    def _write(self, rows):
+        groups = {}
+        for row in rows:
+            groups.setdefault((row["question_key"], row["date"]), []).append(row)
+
+        for (question_key, date), group in groups.items():
+            part_dir = self.root / f"question_key={question_key}" / f"date={date}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pylist(group, schema=RESULTS_SCHEMA)
+            tmp_path = part_dir / f".part-{uuid.uuid4().hex}.parquet.tmp"
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, part_dir / f"part-{uuid.uuid4().hex}.parquet")
+            # Setiap flush menambah file kecil; gabungkan otomatis agar jumlah
+            # file per partisi (dan waktu scan) tetap terbatas
+            self._compact_partition(part_dir, min_small_files=COMPACT_MAX_SMALL_FILES + 1)
+
+    def _compact_partition(self, part_dir, min_small_files=2):
+        """
+        Menggabungkan file kecil (< COMPACT_SMALL_FILE_BYTES) sebuah partisi
+        menjadi satu file. File yang sudah besar tidak ditulis ulang sehingga
+        biaya compaction tidak tumbuh dengan ukuran partisi.
+        """
+        with self._compact_lock:
+            files = sorted(
+                f for f in part_dir.glob("part-*.parquet") if f.stat().st_size < COMPACT_SMALL_FILE_BYTES
+            )
+            if len(files) < min_small_files:
+                return
+            table = pa.concat_tables([pq.read_table(f, schema=RESULTS_SCHEMA) for f in files])
+            tmp_path = part_dir / f".compact-{uuid.uuid4().hex}.parquet.tmp"
+            pq.write_table(table, tmp_path, compression="zstd")
+            os.replace(tmp_path, part_dir / f"part-{uuid.uuid4().hex}.parquet")
+            for f in files:
+                f.unlink()
+
+    def compact(self):
+        """Menggabungkan file kecil di setiap partisi menjadi satu file."""
+        self.flush()
+        for part_dir in self.root.glob("question_key=*/date=*"):
+            self._compact_partition(part_dir)
+
+    # --- BACA ---
+    def dataset(self):
+        return ds.dataset(
+            str(self.root), format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+            schema=pa.unify_schemas([RESULTS_SCHEMA, PARTITION_SCHEMA]),
+        )
+
+    def _filter(self, question_key=None, start_date=None, end_date=None, candidates=None):
+        expr = None
+        for cond in (
+            (ds.field("question_key") == question_key) if question_key else None,
+            (ds.field("date") >= start_date) if start_date else None,
+            (ds.field("date") <= end_date) if end_date else None,
+            ds.field("candidate_email").isin(list(candidates)) if candidates is not None else None,
+        ):
+            if cond is not None:
+                expr = cond if expr is None else expr & cond
+        return expr
+
+    def scan(self, columns, **filters):
+        """Membaca kolom tertentu dengan partition pruning (pertanyaan / rentang tanggal)."""
+        self.flush()
+        if not self.root.exists():
+            return pa.table({c: [] for c in columns})
+        return self.dataset().to_table(columns=columns, filter=self._filter(**filters))
+
+    def iter_batches(self, columns, batch_size=4096, **filters):
+        """Seperti `scan`, tetapi streaming per RecordBatch (memori terbatas)."""
+        self.flush()
+        if not self.root.exists():
+            return
+        yield from self.dataset().to_batches(
+            columns=columns, filter=self._filter(**filters), batch_size=batch_size
+        )
+
+
+# --- ANALITIK ---
+def question_summary(store, **filters):
+    """Ringkasan per pertanyaan: jumlah jawaban, rata-rata skor/confidence/durasi, dsb."""
+    table = store.scan(
+        ["question_key", "score", "confidence", "total_duration", "words_per_minute",
+         "near_duplicate", "t_stt", "t_scoring"],
+        **filters,
+    )
+    if table.num_rows == 0:
+        return pd.DataFrame()
+
+    table = table.append_column(
+        "near_duplicate_int", pc.cast(table["near_duplicate"], pa.int32())
+    )
+    summary = table.group_by("question_key").aggregate([
+        ("score", "count"),
+        ("score", "mean"),
+        ("score", "stddev"),
+        ("confidence", "mean"),
+        ("total_duration", "mean"),
+        ("words_per_minute", "mean"),
+        ("near_duplicate_int", "sum"),
+        ("t_stt", "mean"),
+        ("t_scoring", "mean"),
+    ])
+    df = summary.to_pandas().rename(columns={
+        "score_count": "answers",
+        "near_duplicate_int_sum": "near_duplicates",
+    })
+    return df.set_index("question_key").sort_index()
+
+
+def score_distribution(store, normalize=False, **filters):
+    """Distribusi skor (level rubrik 0-4) per pertanyaan."""
+    table = store.scan(["question_key", "score"], **filters)
+    if table.num_rows == 0:
+        return pd.DataFrame()
+
+    counts = table.group_by(["question_key", "score"]).aggregate([("score", "count")])
+    df = counts.to_pandas().pivot(index="question_key", columns="score", values="score_count")
+    df = df.reindex(columns=range(5)).fillna(0).astype(int).sort_index()
+    if normalize:
+        df = df.div(df.sum(axis=1), axis=0) * 100
+    return df
+
+
+def stage_distribution(store, **filters):
+    """Jumlah jawaban per tahap scoring (rule / lexical / embedding / duplicate) per pertanyaan."""
+    table = store.scan(["question_key", "scoring_stage"], **filters)
+    if table.num_rows == 0:
+        return pd.DataFrame()
+    counts = table.group_by(["question_key", "scoring_stage"]).aggregate([("scoring_stage", "count")])
+    df = counts.to_pandas().pivot(index="question_key", columns="scoring_stage", values="scoring_stage_count")
+    return df.fillna(0).astype(int).sort_index()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cross-candidate analytics over stored results")
+    parser.add_argument("--question", default=None, help="question key, e.g. q3")
+    parser.add_argument("--start", default=None, help="start date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="end date (YYYY-MM-DD)")
+    parser.add_argument("--compact", action="store_true", help="merge small partition files first")
+    args = parser.parse_args()
+
+    store = ResultsStore()
+    if args.compact:
+        store.compact()
+    filters = {"question_key": args.question, "start_date": args.start, "end_date": args.end}
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(question_summary(store, **filters))
+        print(score_distribution(store, normalize=True, **filters).round(1))
+        print(stage_distribution(store, **filters))
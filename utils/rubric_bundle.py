@@ -0,0 +1,191 @@
+# utils/rubric_bundle.py
+"""
+Bundle pertanyaan + rubrik yang sudah dikompilasi.
+
+Satu file berisi header JSON (metadata pertanyaan, teks indikator, offset)
+diikuti matriks embedding float32. Saat runtime file di-memory-map sehingga
+semua proses worker berbagi halaman memori yang sama.
+
+Build:
+    python -m utils.rubric_bundle [--backend torch] [--out data/rubric_bundle.bin]
+"""
+import hashlib
+import json
+import os
+import struct
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+BUNDLE_MAGIC = b"RUBRICB1"
+BUNDLE_FORMAT_VERSION = 2  # v2: header menyimpan backend embedding
+BUNDLE_ALIGN = 64
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+QUESTIONS_PATH = DATA_DIR / "questions.json"
+RUBRIC_PATH = DATA_DIR / "rubric_data.json"
+BUNDLE_PATH = Path(os.environ.get("RUBRIC_BUNDLE_PATH", DATA_DIR / "rubric_bundle.bin"))
+
+
+# --- BUILD ---
+def compute_bundle_version(questions_bytes, rubric_bytes, model_name, backend):
+    """
+    Versi bundle = hash isi sumber + nama model + backend embedding
+    (torch / onnx / onnx_int8 menghasilkan vektor yang sedikit berbeda).
+    """
+    h = hashlib.sha256()
+    h.update(str(BUNDLE_FORMAT_VERSION).encode())
+    h.update(questions_bytes)
+    h.update(rubric_bytes)
+    h.update(model_name.encode())
+    h.update(backend.encode())
+    return h.hexdigest()[:16]
+
+
+def build_bundle(model_embedder, model_name, backend, out_path=BUNDLE_PATH,
+                 questions_path=QUESTIONS_PATH, rubric_path=RUBRIC_PATH):
+    """Mengkompilasi questions.json + rubric_data.json menjadi satu file bundle."""
+    questions_bytes = Path(questions_path).read_bytes()
+    rubric_bytes = Path(rubric_path).read_bytes()
+    questions = json.loads(questions_bytes)
+    rubric = json.loads(rubric_bytes)
+
+    texts = []
+    offsets = {}
+    for qid, entry in rubric.items():
+        offsets[qid] = {}
+        for point_str, indicators in entry.get("ideal_points", {}).items():
+            start = len(texts)
+            texts.extend(ind.lower() for ind in indicators)
+            offsets[qid][point_str] = [start, len(texts)]
+
+    embeddings = np.asarray(model_embedder.encode(texts), dtype=np.float32)
+    if embeddings.ndim != 2:
+        embeddings = embeddings.reshape(len(texts), -1)
+
+    header = {
+        "format": BUNDLE_FORMAT_VERSION,
+        "version": compute_bundle_version(questions_bytes, rubric_bytes, model_name, backend),
+        "model": model_name,
+        "backend": backend,
+        "questions": questions,
+        "rubric": rubric,
+        "offsets": offsets,
+        "shape": list(embeddings.shape),
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    prefix_len = len(BUNDLE_MAGIC) + 8 + len(header_bytes)
+    padding = (-prefix_len) % BUNDLE_ALIGN
+
+    out_path = Path(out_path)
+    # Nama temp unik: dua proses yang rebuild bersamaan tidak saling menimpa
+    tmp_path = out_path.with_name(f".{out_path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * padding)
+        f.write(np.ascontiguousarray(embeddings).tobytes())
+    os.replace(tmp_path, out_path)
+
+    return header["version"]
+
+
+# --- RUNTIME ---
+class RubricBundle:
+    """Bundle yang di-memory-map; lookup per pertanyaan tanpa parsing/encode ulang."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            magic = f.read(len(BUNDLE_MAGIC))
+            if magic != BUNDLE_MAGIC:
+                raise ValueError(f"Not a rubric bundle: {self.path}")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+        if header.get("format") != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format: {header.get('format')}")
+
+        prefix_len = len(BUNDLE_MAGIC) + 8 + header_len
+        data_offset = prefix_len + (-prefix_len) % BUNDLE_ALIGN
+
+        self.version = header["version"]
+        self.model = header["model"]
+        self.backend = header["backend"]
+        self.questions = header["questions"]
+        self.rubric = header["rubric"]
+        self._offsets = header["offsets"]
+        rows, dim = header["shape"]
+        self.embeddings = np.memmap(
+            self.path, dtype=np.float32, mode="r", offset=data_offset, shape=(rows, dim)
+        ) if rows else np.zeros((0, dim), dtype=np.float32)
+
+    def indicator_embeddings(self, question_id, point_str):
+        """Matriks embedding indikator untuk (pertanyaan, level) atau None."""
+        span = self._offsets.get(question_id, {}).get(point_str)
+        if span is None:
+            return None
+        start, end = span
+        return self.embeddings[start:end]
+
+    def is_stale(self, backend=None, questions_path=QUESTIONS_PATH, rubric_path=RUBRIC_PATH):
+        """True jika file sumber berubah atau backend embedding berbeda sejak bundle dibuat."""
+        backend = backend or self.backend
+        if backend != self.backend:
+            return True
+        try:
+            expected = compute_bundle_version(
+                Path(questions_path).read_bytes(), Path(rubric_path).read_bytes(), self.model, backend
+            )
+        except OSError:
+            return False
+        return expected != self.version
+
+
+def load_bundle(path=BUNDLE_PATH, backend=None, embedder_factory=None):
+    """
+    Memuat bundle jika ada dan sesuai sumber + backend embedding aktif.
+    Jika tidak sesuai (atau belum ada) dan `embedder_factory` diberikan,
+    bundle di-build ulang dengan embedder tersebut; jika tidak, None
+    (pemanggil kembali ke JSON + embedding lazy).
+    """
+    from utils.embedding_backend import EMBEDDER_BACKEND, EMBEDDER_MODEL_NAME
+
+    backend = backend or EMBEDDER_BACKEND
+    try:
+        if Path(path).exists():
+            bundle = RubricBundle(path)
+            if not bundle.is_stale(backend):
+                return bundle
+            print(f"Rubric bundle {path} is stale or built for '{bundle.backend}' (active: '{backend}')")
+    except Exception as e:
+        print(f"Error loading rubric bundle: {e}")
+
+    if embedder_factory is None:
+        return None
+    try:
+        embedder = embedder_factory()
+        if embedder is None:
+            return None
+        build_bundle(embedder, EMBEDDER_MODEL_NAME, backend, out_path=path)
+        print(f"Rebuilt rubric bundle {path} for backend '{backend}'")
+        return RubricBundle(path)
+    except Exception as e:
+        print(f"Error rebuilding rubric bundle, falling back to JSON: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.embedding_backend import load_embedder, EMBEDDER_BACKEND, EMBEDDER_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Build the precomputed question/rubric bundle")
+    parser.add_argument("--backend", default=EMBEDDER_BACKEND)
+    parser.add_argument("--out", default=str(BUNDLE_PATH))
+    args = parser.parse_args()
+
+    version = build_bundle(load_embedder(args.backend), EMBEDDER_MODEL_NAME, args.backend, out_path=args.out)
+    print(f"Bundle written to {args.out} (version {version})")
@@ -1,19 +1,21 @@
 import json
 import pandas as pd
-from sentence_transformers import util, SentenceTransformer
 import numpy as np
+from utils.embedding_backend import load_embedder, cos_sim, check_backend_parity
 
 # --- Thresholds ---
 NON_RELEVANT_SIM_THRESHOLD = 0.2
 MIN_LENGTH_FOR_SCORE = 5
+DISFLUENCY_PENALTY_PER_PERCENT = 0.01
+DISFLUENCY_PENALTY_FLOOR = 0.7
 
 # --- MODEL CACHING ---
-def load_embedder_model():
-    """Memuat model SentenceTransformer untuk scoring."""
+def load_embedder_model(backend=None, num_threads=0):
+    """Memuat model embedding untuk scoring (backend: torch / onnx / onnx_int8)."""
     try:
-        return SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2') 
+        return load_embedder(backend, num_threads=num_threads)
     except Exception as e:
-        print(f"Error loading SentenceTransformer: {e}")
+        print(f"Error loading embedder ({backend or 'default'}): {e}")
         return None
 
 # --- FUNGSI RELEVANSI ---
@@ -40,9 +42,11 @@ def is_non_relevant(text: str) -> bool:
     return False
 
 # --- FUNGSI CONFIDENCE SCORE ---
-def compute_confidence_score(transcript: str, text_confidence: float = 0.0) -> float:
+def compute_confidence_score(transcript: str, text_confidence: float = 0.0, disfluency: dict = None) -> float:
     """
     Menghitung skor kepercayaan.
+    `disfluency` (dari `clean_text_with_stats`) memberi penalti untuk
+    filler, pengulangan, dan restart.
     """
     if not transcript or is_non_relevant(transcript):
         return 0.1 
@@ -59,13 +63,20 @@ def compute_confidence_score(transcript: str, text_confidence: float = 0.0) -> f
     # Tambahkan penalti jika sangat pendek
     if len(transcript.split()) < 5:
         scaled_confidence *= 0.8
+    
+    # Penalti disfluency
+    if disfluency:
+        rate = disfluency.get("disfluency_rate", 0.0)
+        scaled_confidence *= max(DISFLUENCY_PENALTY_FLOOR, 1.0 - rate * DISFLUENCY_PENALTY_PER_PERCENT)
         
     return scaled_confidence
 
 # --- FUNGSI SCORING SEMANTIK ---
-def score_with_rubric(question_id, question_text, answer, rubric_data, model_embedder):
+def score_with_rubric(question_id, question_text, answer, rubric_data, model_embedder, bundle=None):
     """
     Menghitung skor berdasarkan perbandingan semantik dengan rubrik.
+    Jika `bundle` (RubricBundle) diberikan, embedding indikator diambil
+    dari bundle yang sudah dikompilasi, bukan di-encode ulang.
     """
     if model_embedder is None:
         return 0, "Error: Embedding model failed to load."
@@ -80,15 +91,19 @@ def score_with_rubric(question_id, question_text, answer, rubric_data, model_emb
     embedding_a = model_embedder.encode(a.lower())
 
     # Fungsi untuk menghitung kecocokan
-    def count_matches(indicators, threshold=0.40):
+    def count_matches(point_str, indicators, threshold=0.40):
         if not indicators:
             return 0
         hits = 0
-        embeddings_indicators = model_embedder.encode([ind.lower() for ind in indicators])
-        similarities = util.cos_sim(embedding_a, embeddings_indicators).flatten()
+        embeddings_indicators = None
+        if bundle is not None:
+            embeddings_indicators = bundle.indicator_embeddings(question_id, point_str)
+        if embeddings_indicators is None:
+            embeddings_indicators = model_embedder.encode([ind.lower() for ind in indicators])
+        similarities = cos_sim(embedding_a, embeddings_indicators).flatten()
         
         for sim in similarities:
-            if sim.item() >= threshold:
+            if sim >= threshold:
                 hits += 1
         return hits
 
@@ -100,7 +115,7 @@ def score_with_rubric(question_id, question_text, answer, rubric_data, model_emb
         if not indicators: 
             continue
 
-        hits = count_matches(indicators)
+        hits = count_matches(point_str, indicators)
         
         # Logika Min hits:
         if point == 4:
@@ -114,4 +129,33 @@ def score_with_rubric(question_id, question_text, answer, rubric_data, model_emb
             return point, rubric.get(point_str, [f"Score {point} achieved"])[0]
 
     # Jika tidak ada yang cocok
-    return 1, rubric.get("1", ["Minimal or Vague Response"])[0]
\ No newline at end of file
+    return 1, rubric.get("1", ["Minimal or Vague Response"])[0]
+
+# --- PARITY CHECK ANTAR BACKEND ---
+def check_scoring_parity(rubric_data, reference_model, candidate_model, answers=None):
+    """
+    Memastikan backend embedding alternatif menghasilkan skor yang sama
+    dengan backend referensi (torch).
+
+    `answers` opsional: dict {question_id: [jawaban, ...]}. Jika tidak ada,
+    indikator rubrik level 4 dipakai sebagai jawaban contoh.
+    """
+    report = check_backend_parity(rubric_data, reference_model, candidate_model)
+
+    if answers is None:
+        answers = {
+            qid: [" ".join(entry.get("ideal_points", {}).get("4", []))]
+            for qid, entry in rubric_data.items()
+        }
+
+    mismatches = []
+    for qid, qanswers in answers.items():
+        for answer in qanswers:
+            ref_score, _ = score_with_rubric(qid, "", answer, rubric_data, reference_model)
+            cand_score, _ = score_with_rubric(qid, "", answer, rubric_data, candidate_model)
+            if ref_score != cand_score:
+                mismatches.append((qid, answer, ref_score, cand_score))
+
+    report["score_mismatches"] = mismatches
+    report["passed"] = report["passed"] and not mismatches
+    return report
@@ -1,22 +1,28 @@
 import os
 import re
+import json
+import shutil
+import subprocess
 import itertools
+from datetime import datetime
 import librosa
 import numpy as np
 import soundfile as sf
-import noisereduce as nr
-import torch
-from faster_whisper import WhisperModel
 from spellchecker import SpellChecker
 from rapidfuzz import process, fuzz
 from rapidfuzz.distance import Levenshtein
 from pydub import AudioSegment
+from utils.word_timings import WordTimings
+from utils.lexicon_index import SymSpellIndex, load_or_build_lexicon_index
 
 # Konfigurasi
 WHISPER_MODEL_NAME = "small" 
 DEVICE = "cpu"
 COMPUTE_TYPE = "int8"
 SR_RATE = 16000 
+MAX_AUDIO_SECONDS = 180  # jendela audio yang dianalisis (3 menit)
+REJECT_AUDIO_SECONDS = float(os.environ.get("REJECT_AUDIO_SECONDS", 0))  # 0 = potong saja, jangan tolak
+PROBE_TIMEOUT_SEC = 15
 
 # Daftar istilah ML/AI
 ML_TERMS = [
@@ -26,7 +32,8 @@ ML_TERMS = [
     "embedding", "deep learning", "dataset", "submission",
     "machine learning", "artificial intelligence", "neural network",
     "convolutional", "pooling", "activation", "optimizer",
-    "loss function", "training", "validation", "testing"
+    "loss function", "training", "validation", "testing",
+    "pretrained", "overfitting", "hyperparameter"
 ]
 
 # Mapping frasa yang sering salah
@@ -43,19 +50,39 @@ PHRASE_MAP = {
 FILLERS = ["umm", "uh", "uhh", "erm", "hmm", "eee", "emmm", "yeah", "ah", "okay", "like", "you know", "so"]
 
 # --- MODEL CACHING ---
-def load_stt_model():
-    """Memuat Faster Whisper model tanpa torch GPU."""
+def load_stt_model(cpu_threads=0):
+    """
+    Memuat Faster Whisper model tanpa torch GPU. `cpu_threads=0` = default
+    CTranslate2 (semua core); worker pool memberi jumlah kecil per worker.
+    """
     try:
         # Force CPU
         import os
         os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
         
+        # Import di sini: CTranslate2 tidak fork-safe, jangan dimuat saat import modul
         from faster_whisper import WhisperModel
-        return WhisperModel("small", device="cpu", compute_type="int8")
+        return WhisperModel("small", device="cpu", compute_type="int8", cpu_threads=cpu_threads)
     except Exception as e:
         print(f"Error loading WhisperModel: {e}")
         return None
 
+def load_text_models():
+    """
+    Memuat indeks leksikon (kamus Inggris + ML_TERMS + target PHRASE_MAP)
+    yang sudah diserialisasi ke disk, atau membangunnya sekali jika belum ada.
+    Mengembalikan (spell_checker, english_words).
+    """
+    try:
+        english_frequencies = dict(SpellChecker().word_frequency.dictionary)
+        domain_terms = sorted(set(ML_TERMS) | set(PHRASE_MAP.values()))
+        lexicon = load_or_build_lexicon_index(english_frequencies, domain_terms)
+        return lexicon, set(english_frequencies)
+    except Exception as e:
+        print(f"Error loading lexicon index, falling back to SpellChecker: {e}")
+        spell = SpellChecker()
+        return spell, set(spell.word_frequency.dictionary)
+
 # --- AUDIO UTILITIES ---
 def video_to_wav(input_video_path, output_wav_path, sr=SR_RATE):
     """Mengkonversi video ke WAV mono pada 16kHz menggunakan pydub."""
@@ -67,15 +94,68 @@ def video_to_wav(input_video_path, output_wav_path, sr=SR_RATE):
     except Exception as e:
         raise RuntimeError(f"Video to WAV conversion failed: {e}")
 
-def noise_reduction(in_wav, out_wav, prop_decrease=0.6):
-    """Menerapkan Noise Reduction."""
+def probe_audio(file_path):
+    """
+    Membaca durasi, sample rate, channel, dan codec dari metadata container
+    (ffprobe / header soundfile) tanpa mendekode audio.
+    """
+    probe = {"duration": None, "sample_rate": None, "channels": None, "codec": None, "has_audio": True}
+
+    if shutil.which("ffprobe"):
+        cmd = [
+            "ffprobe", "-v", "error", "-select_streams", "a:0",
+            "-show_entries", "format=duration:stream=codec_name,sample_rate,channels,duration",
+            "-of", "json", str(file_path)
+        ]
+        try:
+            out = subprocess.run(cmd, capture_output=True, text=True, timeout=PROBE_TIMEOUT_SEC, check=True)
+            info = json.loads(out.stdout or "{}")
+            streams = info.get("streams", [])
+            if not streams:
+                probe["has_audio"] = False
+                return probe
+            stream = streams[0]
+            duration = stream.get("duration") or info.get("format", {}).get("duration")
+            probe["duration"] = float(duration) if duration not in (None, "N/A") else None
+            probe["sample_rate"] = int(stream["sample_rate"]) if stream.get("sample_rate") else None
+            probe["channels"] = stream.get("channels")
+            probe["codec"] = stream.get("codec_name")
+            return probe
+        except Exception as e:
+            print(f"ffprobe failed, falling back to soundfile header: {e}")
+
     try:
-        y, sr = librosa.load(in_wav, sr=SR_RATE)
-        y_clean = nr.reduce_noise(y=y, sr=sr, prop_decrease=prop_decrease)
-        sf.write(out_wav, y_clean, sr)
+        info = sf.info(str(file_path))
+        probe["duration"] = info.duration
+        probe["sample_rate"] = info.samplerate
+        probe["channels"] = info.channels
+        probe["codec"] = info.subtype
+    except Exception:
+        # Format tidak dikenali dari header; durasi diketahui setelah decode terbatas
+        pass
+    return probe
+
+def decode_audio_window(input_path, output_wav_path, max_seconds=MAX_AUDIO_SECONDS, sr=SR_RATE):
+    """Mendekode hanya `max_seconds` pertama ke WAV mono 16kHz."""
+    try:
+        if shutil.which("ffmpeg"):
+            cmd = [
+                "ffmpeg", "-y", "-v", "error", "-i", str(input_path),
+                "-t", str(max_seconds), "-vn", "-ac", "1", "-ar", str(sr),
+                str(output_wav_path)
+            ]
+            subprocess.run(cmd, capture_output=True, check=True)
+        else:
+            y, _ = librosa.load(str(input_path), sr=sr, mono=True, duration=max_seconds)
+            sf.write(str(output_wav_path), y, sr)
         return True
     except Exception as e:
-        raise RuntimeError(f"Noise reduction failed: {e}")
+        raise RuntimeError(f"Audio decoding failed: {e}")
+
+def noise_reduction(in_wav, out_wav, prop_decrease=0.6):
+    """Menerapkan Noise Reduction (chunked, profil noise dari diam awal)."""
+    from utils.denoise import denoise_file
+    return denoise_file(in_wav, out_wav, prop_decrease=prop_decrease)
 
 # --- TEXT CLEANING LOGIC ---
 def correct_ml_terms(word, spell, english_words):
@@ -91,15 +171,104 @@ def correct_ml_terms(word, spell, english_words):
         return match
     return word
 
+def legacy_correction(word, spell, english_words):
+    """Korektor lama per kata (SpellChecker + fuzzy ML_TERMS), acuan regresi indeks leksikon."""
+    sp = spell.correction(word)
+    if sp:
+        word = sp
+    return correct_ml_terms(word, spell, english_words)
+
 def remove_duplicate_words(text):
     """Menghapus kata duplikat berurutan."""
     return " ".join([k for k, g in itertools.groupby(text.split())])
 
+def _norm_token(token):
+    """Bentuk normal token untuk perbandingan (lowercase, tanpa tanda baca)."""
+    return re.sub(r"[^\w']", "", token.lower())
+
+def strip_disfluencies(text):
+    """
+    Tokenisasi satu kali sambil menghapus disfluency dan menghitungnya:
+    - filler      : kata/frasa di FILLERS
+    - repetition  : kata yang diulang berurutan ("the the")
+    - restart     : potongan kata ("wa-") atau frasa 2 kata yang diulang ("i was i was")
+    Mengembalikan (teks_bersih, statistik).
+    """
+    single_fillers = {f for f in FILLERS if " " not in f}
+    multi_fillers = [tuple(f.split()) for f in FILLERS if " " in f]
+
+    tokens = text.split()
+    norms = [_norm_token(t) for t in tokens]
+    kept, kept_norms = [], []
+    fillers = repetitions = restarts = 0
+    after_restart = False
+
+    i = 0
+    while i < len(tokens):
+        token, norm = tokens[i], norms[i]
+
+        # Filler multi-kata
+        phrase = next((p for p in multi_fillers if tuple(norms[i:i + len(p)]) == p), None)
+        if phrase or norm in single_fillers:
+            span = len(phrase) if phrase else 1
+            last = tokens[i + span - 1]
+            # Pertahankan akhir kalimat agar kapitalisasi tetap benar
+            if kept and last[-1:] in ".!?" and kept[-1][-1:] not in ".!?":
+                kept[-1] = kept[-1].rstrip(",;:") + last[-1]
+            fillers += 1
+            i += span
+            continue
+
+        # Potongan kata (restart)
+        if len(token) > 1 and token[-1] in "-\u2014" and norm:
+            restarts += 1
+            after_restart = True
+            i += 1
+            continue
+
+        # Pengulangan tidak dihitung melewati batas kalimat ("the model. Model accuracy")
+        at_sentence_start = bool(kept) and kept[-1][-1:] in ".!?"
+
+        # Frasa 2 kata yang diulang (restart)
+        if (not at_sentence_start and len(kept_norms) >= 2
+                and norms[i:i + 2] == kept_norms[-2:] and all(kept_norms[-2:])):
+            restarts += 1
+            i += 2
+            continue
+
+        # Kata diulang berurutan (repetition)
+        if norm and kept_norms and norm == kept_norms[-1] and not at_sentence_start:
+            # "we wa- we": pengulangan setelah potongan kata adalah bagian dari restart
+            if not after_restart:
+                repetitions += 1
+            i += 1
+            continue
+
+        after_restart = False
+        kept.append(token)
+        kept_norms.append(norm)
+        i += 1
+
+    word_count = sum(1 for n in kept_norms if n)
+    total = word_count + fillers + repetitions + restarts
+    stats = {
+        "filler_count": fillers,
+        "repetition_count": repetitions,
+        "restart_count": restarts,
+        "word_count": word_count,
+        "disfluency_rate": ((fillers + repetitions + restarts) / total) * 100 if total else 0.0,
+    }
+    return " ".join(kept), stats
+
 def clean_text(text, spell, english_words):
     """Membersihkan teks transkripsi."""
-    # 1. Hapus filler words
-    pattern = r"\b(" + "|".join(FILLERS) + r")\b"
-    text = re.sub(pattern, "", text, flags=re.IGNORECASE)
+    cleaned_text, _ = clean_text_with_stats(text, spell, english_words)
+    return cleaned_text
+
+def clean_text_with_stats(text, spell, english_words):
+    """Membersihkan teks transkripsi dan mengembalikan statistik disfluency."""
+    # 1. Hapus filler, pengulangan, dan restart (satu pass tokenisasi)
+    text, disfluency = strip_disfluencies(text)
     
     # 2. Hapus tanda baca berlebihan
     text = re.sub(r"\.{2,}", "", text)
@@ -115,10 +284,11 @@ def clean_text(text, spell, english_words):
     # 5. Koreksi per kata
     words = []
     for w in text.split():
-        sp = spell.correction(w)
-        if sp:
-            w = sp
-        w = correct_ml_terms(w, spell, english_words)
+        if isinstance(spell, SymSpellIndex):
+            # Satu lookup untuk kamus Inggris + istilah ML sekaligus
+            w = spell.correction(w)
+        else:
+            w = legacy_correction(w, spell, english_words)
         words.append(w)
     
     text = " ".join(words)
@@ -131,57 +301,78 @@ def clean_text(text, spell, english_words):
     sentences = [s.capitalize() for s in sentences if s]
     text = ' '.join(sentences)
     
-    return text
+    return text, disfluency
 
 # --- FUNGSI UTAMA TRANSKRIPSI ---
-def transcribe_and_clean(audio_path, whisper_model, spell_checker, english_words):
-    """Melakukan transkripsi dan membersihkan teks."""
+def transcribe_with_timings(audio_path, whisper_model, spell_checker, english_words):
+    """
+    Melakukan transkripsi + pembersihan teks, sekaligus mengembalikan
+    timestamp per kata (WordTimings) dan statistik disfluency untuk
+    analisis non-verbal dan confidence.
+    """
     try:
-        segments, _ = whisper_model.transcribe(
+        segments, info = whisper_model.transcribe(
             audio_path, 
             language="en", 
             task="transcribe", 
             beam_size=4, 
-            vad_filter=True
+            vad_filter=True,
+            word_timestamps=True
         )
+        # segments adalah generator: materialisasi sekali untuk teks dan timing
+        segments = list(segments)
         raw_text = " ".join([seg.text for seg in segments])
+        timings = WordTimings.from_segments(
+            segments, duration=getattr(info, "duration", None), fillers=FILLERS
+        )
         
-        cleaned_text = clean_text(raw_text, spell_checker, english_words)
-        return cleaned_text
+        cleaned_text, disfluency = clean_text_with_stats(raw_text, spell_checker, english_words)
+        return cleaned_text, timings, disfluency
     except Exception as e:
         raise RuntimeError(f"Transcription error: {e}")
 
-# ==== TAMBAHKAN DI SINI ====
+def transcribe_and_clean(audio_path, whisper_model, spell_checker, english_words):
+    """Melakukan transkripsi dan membersihkan teks."""
+    cleaned_text, _, _ = transcribe_with_timings(audio_path, whisper_model, spell_checker, english_words)
+    return cleaned_text
+
+# --- UPLOAD HANDLING ---
+def prepare_audio_upload(uploaded_file, temp_dir, max_seconds=MAX_AUDIO_SECONDS):
+    """
+    Menyimpan upload, memeriksa metadata tanpa decode, lalu mendekode hanya
+    jendela yang diizinkan ke WAV 16kHz mono.
+    Mengembalikan (wav_path, probe); probe["truncated"] menandai upload yang terpotong.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    file_ext = uploaded_file.name.split('.')[-1].lower()
+    raw_path = temp_dir / f"upload_{timestamp}.{file_ext}"
+    wav_path = temp_dir / f"response_{timestamp}.wav"
+
+    with open(raw_path, "wb") as f:
+        f.write(uploaded_file.getbuffer())
+
+    try:
+        probe = probe_audio(raw_path)
+        if not probe["has_audio"]:
+            raise RuntimeError("Uploaded file has no audio track")
+
+        duration = probe["duration"]
+        if REJECT_AUDIO_SECONDS and duration and duration > REJECT_AUDIO_SECONDS:
+            raise RuntimeError(
+                f"Recording is too long ({duration / 60:.1f} min, max {REJECT_AUDIO_SECONDS / 60:.1f} min)"
+            )
+        probe["truncated"] = bool(duration and duration > max_seconds)
+
+        decode_audio_window(raw_path, wav_path, max_seconds=max_seconds)
+        return wav_path, probe
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
 def process_audio_for_streamlit(uploaded_file, temp_dir):
     """Optimized audio processing for Streamlit Cloud"""
     try:
-        # Simpan file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_ext = uploaded_file.name.split('.')[-1]
-        
-        # Batasi format
-        if file_ext.lower() not in ['mp3', 'wav', 'm4a']:
-            # Convert ke wav jika format tidak support
-            file_ext = 'wav'
-            
-        filename = f"response_{timestamp}.{file_ext}"
-        file_path = temp_dir / filename
-        
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        # Batasi durasi (max 3 menit)
-        import librosa
-        y, sr = librosa.load(file_path, sr=16000)
-        duration = len(y) / sr
-        
-        if duration > 180:  # 3 menit
-            # Potong audio
-            y = y[:180 * sr]  # Ambil 3 menit pertama
-            import soundfile as sf
-            sf.write(file_path, y, sr)
-        
-        return file_path
-        
+        wav_path, _ = prepare_audio_upload(uploaded_file, temp_dir)
+        return wav_path
     except Exception as e:
-        raise RuntimeError(f"Audio processing error: {str(e)}")
\ No newline at end of file
+        raise RuntimeError(f"Audio processing error: {str(e)}")
@@ -0,0 +1,118 @@
+# utils/word_timings.py
+"""
+Struktur ringkas untuk timestamp per kata dari Whisper.
+
+Disimpan sebagai array numpy (start, end, probability, flag filler) + list
+kata, sehingga tahap analisis lain (non-verbal, disfluency, laporan) bisa
+memakai hasil STT yang sama tanpa memproses audio ulang.
+"""
+import numpy as np
+
+
+class WordTimings:
+    """Timestamp kata berbasis array (detik, relatif terhadap awal audio)."""
+
+    __slots__ = ("words", "starts", "ends", "probs", "is_filler", "duration")
+
+    def __init__(self, words, starts, ends, probs=None, is_filler=None, duration=None):
+        n = len(words)
+        self.words = list(words)
+        self.starts = np.asarray(starts, dtype=np.float32).reshape(n)
+        self.ends = np.asarray(ends, dtype=np.float32).reshape(n)
+        self.probs = (np.asarray(probs, dtype=np.float32).reshape(n)
+                      if probs is not None else np.ones(n, dtype=np.float32))
+        self.is_filler = (np.asarray(is_filler, dtype=bool).reshape(n)
+                          if is_filler is not None else np.zeros(n, dtype=bool))
+        if duration is None:
+            duration = float(self.ends[-1]) if n else 0.0
+        self.duration = float(duration)
+
+    @classmethod
+    def from_segments(cls, segments, duration=None, fillers=()):
+        """Membangun dari segmen faster-whisper (transcribe(word_timestamps=True))."""
+        words, starts, ends, probs = [], [], [], []
+        for seg in segments:
+            for w in (getattr(seg, "words", None) or []):
+                words.append(w.word.strip())
+                starts.append(w.start)
+                ends.append(w.end)
+                probs.append(w.probability)
+        is_filler = mark_fillers(words, fillers)
+        return cls(words, starts, ends, probs, is_filler, duration)
+
+    def __len__(self):
+        return len(self.words)
+
+    @property
+    def text(self):
+        return " ".join(self.words)
+
+    @property
+    def speech_time(self):
+        """Total detik yang diisi kata."""
+        return float(np.sum(self.ends - self.starts)) if len(self) else 0.0
+
+    def gaps(self):
+        """Jeda antar kata berurutan (detik), panjang len-1."""
+        if len(self) < 2:
+            return np.zeros(0, dtype=np.float32)
+        return np.clip(self.starts[1:] - self.ends[:-1], 0.0, None)
+
+    def shifted(self, offset, duration=None):
+        """Salinan dengan timestamp digeser `offset` detik (mis. setelah trim diam awal)."""
+        return WordTimings(self.words, self.starts + offset, self.ends + offset, self.probs,
+                           self.is_filler, duration if duration is not None else self.duration + offset)
+
+    @classmethod
+    def concatenate(cls, parts, duration=None):
+        """Menggabungkan beberapa WordTimings (sudah di timeline yang sama) secara berurutan."""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls([], [], [], duration=duration or 0.0)
+        return cls(
+            [w for p in parts for w in p.words],
+            np.concatenate([p.starts for p in parts]),
+            np.concatenate([p.ends for p in parts]),
+            np.concatenate([p.probs for p in parts]),
+            np.concatenate([p.is_filler for p in parts]),
+            duration,
+        )
+
+    def to_dict(self):
+        """Serialisasi ringkas (untuk session state / penyimpanan)."""
+        return {
+            "words": self.words,
+            "starts": self.starts.round(3).tolist(),
+            "ends": self.ends.round(3).tolist(),
+            "probs": self.probs.round(3).tolist(),
+            "is_filler": self.is_filler.tolist(),
+            "duration": self.duration,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["words"], data["starts"], data["ends"], data.get("probs"),
+                   data.get("is_filler"), data.get("duration"))
+
+
+def _normalize_word(word):
+    return "".join(ch for ch in word.lower() if ch.isalnum() or ch == "'")
+
+
+def mark_fillers(words, fillers):
+    """Flag boolean per kata untuk filler (termasuk filler multi-kata seperti 'you know')."""
+    flags = np.zeros(len(words), dtype=bool)
+    if not fillers or not words:
+        return flags
+
+    normalized = [_normalize_word(w) for w in words]
+    multi = [tuple(f.split()) for f in fillers if " " in f]
+    single = {f for f in fillers if " " not in f}
+
+    for i, w in enumerate(normalized):
+        if w in single:
+            flags[i] = True
+        for phrase in multi:
+            if tuple(normalized[i:i + len(phrase)]) == phrase:
+                flags[i:i + len(phrase)] = True
+    return flags
@@ -0,0 +1,566 @@
+# utils/worker_pool.py
+"""
+Worker pool pre-fork dengan data bersama (copy-on-write).
+
+Data read-only berbasis numpy/mmap (bundle rubrik, indeks leksikon, bank
+soal, cascade scorer) dimuat SEKALI di proses induk, lalu worker di-fork
+dari induk tersebut sehingga data itu dibagi copy-on-write.
+
+Bobot model TIDAK dibagi. Model inferensi (Whisper/CTranslate2, embedder
+torch/ONNX Runtime) tidak dimuat di induk karena runtime-nya memiliki
+thread pool dan state native yang tidak fork-safe (worker hasil fork bisa
+hang atau crash). Setiap worker memuat model sendiri setelah fork lewat
+`initializer`, dengan batas thread yang ditetapkan sebelum runtime
+tersebut di-import. Konsekuensinya:
+- setiap worker membayar cold start muat model (saat start dan setiap
+  kali di-recycle),
+- RAM model terduplikasi per worker.
+Biaya ini diukur per worker (`worker_init_seconds`, `worker_model_mb` di
+`stats()`) dan dicetak saat pool siap; gunakan untuk memilih `workers`
+dan `max_jobs`.
+
+Worker di-recycle (keluar lalu diganti fork baru dari induk) setelah
+`max_jobs` job atau jika RSS-nya tumbuh melebihi `max_rss_growth_mb`
+dibanding setelah model dimuat; recycle berarti memuat ulang model. Job yang melebihi `job_timeout` membuat
+worker-nya di-kill dan diganti; future job itu gagal dengan TimeoutError.
+Hanya untuk Linux/macOS (start method "fork").
+
+Contoh:
+    with WarmWorkerPool(workers=4) as pool:
+        future = pool.submit(process_answer_job, "answer.wav", question, candidate)
+        result = future.result()
+
+Smoke test dengan model asli (stand-in load test tidak menangkap masalah fork):
+    python -m utils.worker_pool answer.wav
+"""
+import gc
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+POOL_WORKERS = int(os.environ.get("POOL_WORKERS", os.cpu_count() or 1))
+POOL_MAX_JOBS = int(os.environ.get("POOL_MAX_JOBS", 200))                  # job per worker sebelum recycle
+POOL_MAX_RSS_GROWTH_MB = float(os.environ.get("POOL_MAX_RSS_GROWTH_MB", 512))
+WORKER_THREADS = int(os.environ.get("POOL_WORKER_THREADS", 1))             # thread inferensi per worker
+POOL_JOB_TIMEOUT_SEC = float(os.environ.get("POOL_JOB_TIMEOUT_SEC", 300))   # 0 = tanpa batas
+POOL_INIT_TIMEOUT_SEC = float(os.environ.get("POOL_INIT_TIMEOUT_SEC", 600))  # batas muat model di worker
+SUPERVISE_INTERVAL_SEC = 0.5
+
+# Runtime yang tidak boleh sudah dimuat di induk saat fork
+FORK_UNSAFE_MODULES = ("ctranslate2", "torch", "onnxruntime")
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "CT2_INTER_THREADS")
+
+# Diisi di induk sebelum fork; worker mewarisinya (copy-on-write)
+_SHARED = None
+
+
+def _rebuild_bundle_child():
+    """Proses spawn terpisah: embedder dimuat dan dibuang di sini, bukan di induk pool."""
+    from utils.scoring_logic import load_embedder_model
+    from utils.rubric_bundle import load_bundle
+
+    load_bundle(embedder_factory=load_embedder_model)
+
+
+def load_shared_data():
+    """
+    Loader induk default: hanya data numpy/mmap yang dibagi ke worker
+    (leksikon, bundle rubrik, bank soal, cascade scorer). Jika bundle basi,
+    bundle di-build ulang di proses spawn agar embedder tidak dimuat di induk.
+    """
+    from utils.stt_processor import load_text_models, ML_TERMS
+    from utils.cascade_scorer import CascadeScorer
+    from utils.question_bank import QuestionBank
+    from utils.rubric_bundle import load_bundle, QUESTIONS_PATH, RUBRIC_PATH
+
+    spell_checker, english_words = load_text_models()
+    bundle = load_bundle()
+    if bundle is None:
+        proc = mp.get_context("spawn").Process(target=_rebuild_bundle_child, name="bundle-builder")
+        proc.start()
+        proc.join()
+        bundle = load_bundle()
+    bank = QuestionBank.from_files(QUESTIONS_PATH, RUBRIC_PATH, bundle=bundle)
+    scorer = CascadeScorer(bank.rubric, domain_terms=ML_TERMS)
+    scorer.load_calibration()
+    return {
+        "text_models": (spell_checker, english_words),
+        "scorer": scorer,
+        "question_bank": bank,
+    }
+
+
+def init_pipeline_worker(shared, threads=WORKER_THREADS):
+    """
+    Initializer default (di worker, setelah fork): memuat Whisper dan
+    embedder dengan `threads` thread inferensi, lalu melengkapi `shared`
+    sehingga bentuknya sama dengan resource yang di-cache app.py.
+    """
+    from utils.stt_processor import load_stt_model
+    from utils.scoring_logic import load_embedder_model
+
+    whisper_model = load_stt_model(cpu_threads=threads)
+    embedder_model = load_embedder_model(num_threads=threads)
+    if whisper_model is None or embedder_model is None:
+        raise RuntimeError("Failed to load Whisper or the embedder in worker")
+    spell_checker, english_words = shared["text_models"]
+    # Salinan privat worker (CoW): embedding lazy untuk soal di luar bundle
+    shared["question_bank"].embedder = embedder_model
+    shared["models"] = (whisper_model, spell_checker, embedder_model, english_words)
+
+
+def fork_unsafe_modules():
+    """Runtime tidak fork-safe yang sudah di-import di proses ini."""
+    return [name for name in FORK_UNSAFE_MODULES if name in sys.modules]
+
+
+def process_answer_job(shared, audio_path, question, candidate=None, denoise=None, profile=None):
+    """
+    Job standar: pipeline lengkap satu jawaban di worker. Duplicate index
+    dan results store tetap dikelola proses induk (state bersama).
+    `profile=None` memakai sampling DEBUG_MODE/PROFILE_SAMPLE_PERCENT.
+    """
+    from utils.pipeline import process_answer
+    from utils.denoise import DENOISE_ENABLED
+    from utils.profiling import profile_request, should_profile
+
+    enabled = should_profile() if profile is None else profile
+    with profile_request(f"worker_{question.get('key', 'answer')}", enabled=enabled):
+        return process_answer(
+            audio_path, question, shared["models"], shared["scorer"], candidate=candidate,
+            question_bank=shared["question_bank"],
+            denoise=DENOISE_ENABLED if denoise is None else denoise,
+        )
+
+
+# --- MEMORI ---
+def _read_status_kb(pid, field):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def rss_mb(pid=None):
+    """RSS proses (MB). Pakai /proc di Linux, fallback ke getrusage (puncak)."""
+    kb = _read_status_kb(pid or os.getpid(), "VmRSS")
+    if kb is not None:
+        return kb / 1024
+    if pid not in (None, os.getpid()):
+        return None
+    import resource
+    import sys
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def private_mb(pid):
+    """Memori privat (bukan shared CoW) sebuah proses dari smaps_rollup, jika ada."""
+    try:
+        total = 0
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    total += int(line.split()[1])
+        return total / 1024
+    except (OSError, ValueError):
+        return None
+
+
+# --- WORKER ---
+def _limit_threads(n):
+    """
+    Hindari oversubscription: setiap worker memakai sedikit thread inferensi.
+    Dipanggil sebelum initializer meng-import runtime inferensi, karena
+    variabel lingkungan ini hanya dibaca saat runtime dimuat.
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n)
+
+
+def _worker_main(worker_id, current_job, job_started, task_queue, result_queue, initializer,
+                 max_jobs, max_rss_growth_mb, threads):
+    _limit_threads(threads)
+    pid = os.getpid()
+    if initializer is not None:
+        start, rss_before = time.perf_counter(), rss_mb() or 0.0
+        try:
+            initializer(_SHARED, threads)
+        except Exception as e:
+            result_queue.put(("init_failed", worker_id, f"{type(e).__name__}: {e}"))
+            return
+        # Biaya model per worker: waktu muat dan RSS tambahan (tidak dibagi)
+        result_queue.put(("ready", worker_id, time.perf_counter() - start, (rss_mb() or 0.0) - rss_before))
+    else:
+        result_queue.put(("ready", worker_id, 0.0, 0.0))
+
+    baseline = rss_mb()
+    jobs = 0
+    reason = "shutdown"
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        job_id, fn, args, kwargs = task
+        # Ditulis langsung ke shared memory: tetap terbaca induk jika worker
+        # crash atau melebihi timeout
+        job_started.value = time.monotonic()
+        current_job.value = job_id
+        try:
+            message = ("done", worker_id, job_id, True, fn(_SHARED, *args, **kwargs))
+        except Exception as e:
+            message = ("done", worker_id, job_id, False, e)
+        # Direset sebelum put: worker tidak di-kill saat memegang lock queue
+        current_job.value = -1
+        result_queue.put(message)
+
+        jobs += 1
+        growth = (rss_mb() or baseline) - baseline
+        if jobs >= max_jobs:
+            reason = "max_jobs"
+            break
+        if growth > max_rss_growth_mb:
+            reason = "rss_growth"
+            break
+
+    result_queue.put(("exit", worker_id, pid, reason, jobs))
+
+
+class WarmWorkerPool:
+    """Pool proses pre-fork: data dibagi dari induk, model dimuat per worker."""
+
+    def __init__(self, loader=load_shared_data, initializer=init_pipeline_worker, workers=POOL_WORKERS,
+                 max_jobs=POOL_MAX_JOBS, max_rss_growth_mb=POOL_MAX_RSS_GROWTH_MB,
+                 worker_threads=WORKER_THREADS, job_timeout=POOL_JOB_TIMEOUT_SEC):
+        if "fork" not in mp.get_all_start_methods():
+            raise RuntimeError("WarmWorkerPool requires the 'fork' start method (Linux/macOS)")
+        self.loader = loader
+        self.initializer = initializer
+        self.workers = max(1, int(workers))
+        self.max_jobs = max_jobs
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.worker_threads = worker_threads
+        self.job_timeout = job_timeout
+
+        self._ctx = mp.get_context("fork")
+        self._task_queue = None
+        self._result_queue = None
+        self._procs = {}            # worker_id -> Process
+        self._current = {}          # worker_id -> mp.Value job_id yang sedang dikerjakan (-1 = idle)
+        self._started_at = {}       # worker_id -> mp.Value waktu mulai job (time.monotonic)
+        self._futures = {}          # job_id -> Future
+        self._job_ids = itertools.count()
+        self._worker_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._ready_workers = set()
+        self._collector = None
+        self._closed = False
+        self.started = False
+        self.init_error = None
+        self.load_seconds = 0.0
+        self.worker_init_seconds = []
+        self.worker_model_mb = []
+        self.recycled = {"max_jobs": 0, "rss_growth": 0, "crashed": 0, "timeout": 0}
+        self.jobs_done = 0
+
+    # --- SIKLUS HIDUP ---
+    def start(self, wait_ready=True, timeout=POOL_INIT_TIMEOUT_SEC):
+        """
+        Memuat data bersama, fork worker, dan (default) menunggu semua worker
+        selesai memuat model. RuntimeError jika initializer worker gagal.
+        """
+        global _SHARED
+        if self.started:
+            return self
+        start = time.perf_counter()
+        _SHARED = self.loader() if self.loader is not None else None
+        self.load_seconds = time.perf_counter() - start
+
+        unsafe = fork_unsafe_modules()
+        if unsafe:
+            print(f"Warning: {', '.join(unsafe)} already imported before fork; "
+                  "workers may hang. Load models in the worker initializer instead.")
+
+        gc.collect()
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        for _ in range(self.workers):
+            self._spawn()
+        self._collector = threading.Thread(target=self._collect, name="warm-pool-collector", daemon=True)
+        self._collector.start()
+        self.started = True
+        if wait_ready:
+            self.wait_ready(timeout)
+            print(f"Worker pool ready: {len(self._procs)} workers, model load "
+                  f"{max(self.worker_init_seconds):.1f}s and {max(self.worker_model_mb):.0f} MB private per worker")
+        return self
+
+    def wait_ready(self, timeout=POOL_INIT_TIMEOUT_SEC):
+        """Menunggu semua worker selesai menjalankan initializer."""
+        with self._ready:
+            done = self._ready.wait_for(
+                lambda: self.init_error is not None or len(self._ready_workers) >= len(self._procs),
+                timeout=timeout,
+            )
+        if self.init_error is not None:
+            self.shutdown(wait=False)
+            raise RuntimeError(f"Worker initializer failed: {self.init_error}")
+        if not done:
+            self.shutdown(wait=False)
+            raise RuntimeError(f"Workers not ready after {timeout:.0f}s")
+
+    def _spawn(self):
+        worker_id = next(self._worker_ids)
+        current_job = self._ctx.Value("q", -1, lock=False)
+        job_started = self._ctx.Value("d", 0.0, lock=False)
+        proc = self._ctx.Process(
+            target=_worker_main, name=f"warm-worker-{worker_id}", daemon=True,
+            args=(worker_id, current_job, job_started, self._task_queue, self._result_queue,
+                  self.initializer, self.max_jobs, self.max_rss_growth_mb, self.worker_threads),
+        )
+        # Objek yang sudah ada dipindah ke generasi permanen GC selama fork agar
+        # tidak disentuh (dan disalin) oleh siklus GC di worker; di induk
+        # dikembalikan setelah fork supaya GC proses pemanggil tetap normal
+        gc.freeze()
+        try:
+            proc.start()
+        finally:
+            gc.unfreeze()
+        self._procs[worker_id] = proc
+        self._current[worker_id] = current_job
+        self._started_at[worker_id] = job_started
+
+    def _forget(self, worker_id):
+        self._current.pop(worker_id, None)
+        self._started_at.pop(worker_id, None)
+        with self._lock:
+            self._ready_workers.discard(worker_id)
+        return self._procs.pop(worker_id, None)
+
+    def shutdown(self, wait=True):
+        if not self.started or self._closed:
+            return
+        self._closed = True
+        for _ in range(len(self._procs)):
+            self._task_queue.put(None)
+        if wait:
+            for proc in list(self._procs.values()):
+                proc.join()
+            self._collector.join(timeout=SUPERVISE_INTERVAL_SEC * 4)
+        else:
+            for proc in list(self._procs.values()):
+                proc.terminate()
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    # --- JOB ---
+    def submit(self, fn, *args, **kwargs):
+        """
+        Menjalankan `fn(shared, *args, **kwargs)` di worker. `fn` harus
+        fungsi level modul (dipickle per referensi); argumen dan hasil harus
+        bisa dipickle.
+        """
+        if not self.started:
+            self.start()
+        if self._closed:
+            raise RuntimeError("Cannot submit to a pool that has been shut down")
+        if self.init_error is not None:
+            raise RuntimeError(f"Worker initializer failed: {self.init_error}")
+        future = Future()
+        with self._lock:
+            job_id = next(self._job_ids)
+            self._futures[job_id] = future
+        self._task_queue.put((job_id, fn, args, kwargs))
+        return future
+
+    def map(self, fn, *iterables):
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+        for future in futures:
+            yield future.result()
+
+    # --- SUPERVISI ---
+    def _collect(self):
+        """Thread induk: menerima hasil, mengganti worker yang keluar/mati/timeout."""
+        while True:
+            try:
+                message = self._result_queue.get(timeout=SUPERVISE_INTERVAL_SEC)
+            except queue.Empty:
+                message = None
+            except (EOFError, OSError):
+                return
+
+            if message is not None:
+                self._handle(message)
+            self._reap_timed_out()
+            self._reap_crashed()
+
+            if self._closed and not any(p.is_alive() for p in self._procs.values()):
+                return
+
+    def _fail(self, job_id, error):
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+        if future is not None and future.set_running_or_notify_cancel():
+            future.set_exception(error)
+
+    def _handle(self, message):
+        kind, worker_id = message[0], message[1]
+        if kind == "done":
+            _, _, job_id, ok, value = message
+            self.jobs_done += 1
+            with self._lock:
+                future = self._futures.pop(job_id, None)
+            if future is not None and future.set_running_or_notify_cancel():
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        elif kind == "ready":
+            self.worker_init_seconds.append(message[2])
+            self.worker_model_mb.append(message[3])
+            with self._ready:
+                self._ready_workers.add(worker_id)
+                self._ready.notify_all()
+        elif kind == "init_failed":
+            # Tidak diganti: initializer yang gagal kemungkinan gagal lagi
+            proc = self._forget(worker_id)
+            if proc is not None:
+                proc.join()
+            print(f"Worker {worker_id} failed to initialize: {message[2]}")
+            with self._ready:
+                self.init_error = message[2]
+                self._ready.notify_all()
+            if not self._procs:
+                with self._lock:
+                    pending = list(self._futures)
+                for job_id in pending:
+                    self._fail(job_id, RuntimeError(f"Worker initializer failed: {message[2]}"))
+        elif kind == "exit":
+            _, _, _, reason, _ = message
+            proc = self._forget(worker_id)
+            if proc is not None:
+                proc.join()
+            if reason in self.recycled:
+                self.recycled[reason] += 1
+            if not self._closed:
+                self._spawn()
+
+    def _reap_timed_out(self):
+        """Worker yang job-nya melebihi `job_timeout`: kill, gagalkan job-nya, lalu ganti."""
+        if not self.job_timeout:
+            return
+        now = time.monotonic()
+        for worker_id, proc in list(self._procs.items()):
+            job_id = self._current[worker_id].value
+            if job_id < 0 or now - self._started_at[worker_id].value < self.job_timeout:
+                continue
+            proc.kill()
+            proc.join()
+            self._forget(worker_id)
+            self.recycled["timeout"] += 1
+            self._fail(job_id, TimeoutError(
+                f"Job exceeded {self.job_timeout:.0f}s; worker {worker_id} was killed"
+            ))
+            if not self._closed:
+                self._spawn()
+
+    def _reap_crashed(self):
+        """Worker yang mati tanpa pesan 'exit' (mis. OOM-kill): gagalkan job-nya lalu ganti."""
+        for worker_id, proc in list(self._procs.items()):
+            if proc.is_alive() or proc.exitcode == 0:
+                continue
+            job_id = self._current[worker_id].value
+            self._forget(worker_id)
+            self.recycled["crashed"] += 1
+            self._fail(job_id, RuntimeError(f"Worker {worker_id} died with exit code {proc.exitcode}"))
+            if not self._closed:
+                self._spawn()
+
+    # --- STATUS ---
+    def stats(self):
+        """Ringkasan pool: worker aktif, job selesai, recycle, dan memori per worker."""
+        procs = list(self._procs.values())
+        return {
+            "workers": len(procs),
+            "jobs_done": self.jobs_done,
+            "pending": len(self._futures),
+            "recycled": dict(self.recycled),
+            "load_seconds": self.load_seconds,
+            "worker_init_seconds": list(self.worker_init_seconds),
+            "worker_model_mb": list(self.worker_model_mb),
+            "parent_rss_mb": rss_mb(),
+            "worker_rss_mb": [rss_mb(p.pid) for p in procs],
+            "worker_private_mb": [private_mb(p.pid) for p in procs],
+        }
+
+
+def shared_resources():
+    """Resource bersama di proses saat ini (induk setelah start, atau worker)."""
+    return _SHARED
+
+
+# --- SMOKE TEST ---
+def smoke_test(audio_path, question_key=None, timeout=POOL_JOB_TIMEOUT_SEC, workers=1):
+    """
+    Satu job pipeline lengkap di pool dengan model ASLI (Whisper + embedder).
+    Memastikan worker hasil fork tidak hang/crash: gagal jika induk sudah
+    memuat runtime tidak fork-safe atau job melebihi `timeout`.
+    """
+    pool = WarmWorkerPool(workers=workers, job_timeout=timeout)
+    try:
+        pool.start()
+        unsafe = fork_unsafe_modules()
+        if unsafe:
+            raise RuntimeError(f"Fork-unsafe runtimes loaded in the parent: {', '.join(unsafe)}")
+        bank = shared_resources()["question_bank"]
+        key = question_key or bank.keys_for()[0]
+        question = dict(bank.get(key), key=key)
+        start = time.perf_counter()
+        result = pool.submit(process_answer_job, str(audio_path), question).result(timeout=timeout + 10)
+        return {
+            "seconds": time.perf_counter() - start,
+            "score": result["score"],
+            "transcript": result["transcript"],
+            "pool": pool.stats(),
+        }
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run one answer through the warm worker pool with real models")
+    parser.add_argument("audio", help="answer audio file (wav/mp3)")
+    parser.add_argument("--question", default=None, help="question key (default: first in the bank)")
+    parser.add_argument("--timeout", type=float, default=POOL_JOB_TIMEOUT_SEC)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        report = smoke_test(args.audio, args.question, timeout=args.timeout, workers=args.workers)
+    except Exception as e:
+        print(f"Smoke test FAILED: {type(e).__name__}: {e}")
+        sys.exit(1)
+    print(f"Smoke test passed in {report['seconds']:.1f}s (score {report['score']})")
+    print(f"Transcript: {report['transcript'][:200]}")
+    print(f"Pool: {report['pool']}")